@@ -1,26 +1,38 @@
 import streamlit as st
-import math
+import time
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import io
-import xlsxwriter
-from docx import Document
-from docx.shared import Pt, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
+from functools import partial
+from pathlib import Path
+from reports import excel_bytes, docx_bytes
+from drawings import grid_axes, plan_figure, elevation_figure, highlight_level, lod_levels
+from piles import footing_layout, layout_summary, capacity_table, PILE_LENGTH, MAX_ROWS
+from sweep import run_sweep, pareto_front, METRIC_COLS
+from elements import OK, display_table
+from profiling import Profiler, new_history, history_table, history_json
+from scenarios import Workspace, compare_summary, compare_columns, compare_beams, compare_foundation, diff_mask
+from engine import RB_MAP, RS_MAP, Q_DEFAULTS, PILE_STD, B_COL_RANGE, FOUND_PILE, FOUND_SHALLOW, DesignInput, design_graph, design_inputs, takedown_table, parse_input_string, parse_segments, level_z, level_label, pile_diameter
 
 # ==========================================
 # 0. CẤU HÌNH & HÀM HỖ TRỢ
 # ==========================================
+# Icon đóng gói cùng app (chạy được trong mạng nội bộ); file SVG làm favicon cũng tránh nạp bảng emoji của streamlit
+LOGO = str(Path(__file__).parent / "assets" / "structural.svg")
 st.set_page_config(
     page_title="Structure AI V21 (Final Perfect)",
-    page_icon="🏗️",
+    page_icon=LOGO,
     layout="wide",
     initial_sidebar_state="expanded"
 )
 
 if 'current_floor_idx' not in st.session_state:
     st.session_state.current_floor_idx = 0
+if 'prof_history' not in st.session_state:
+    st.session_state.prof_history = new_history()
+if 'workspace' not in st.session_state:
+    st.session_state.workspace = Workspace()
+# Bật/tắt ở cuối sidebar; đọc trước để đo được cả bước nhập liệu
+prof = Profiler(st.session_state.get("profiling", False), st.session_state.prof_history)
 
 # CSS Styles
 st.markdown("""
@@ -33,61 +45,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# --- HÀM TẠO FILE WORD (REPORT ENGINE) ---
-def create_docx_report(project_name, project_type, mat_info, load_info, design_results):
-    doc = Document()
-    style = doc.styles['Normal']
-    font = style.font
-    font.name = 'Times New Roman'
-    font.size = Pt(12)
-
-    # Header
-    head = doc.add_heading(f'THUYẾT MINH TÍNH TOÁN KẾT CẤU SƠ BỘ', 0)
-    head.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    p = doc.add_paragraph(f"DỰ ÁN: {project_name.upper()}")
-    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    doc.add_paragraph(f"Loại công trình: {project_type} | Ngày lập: {pd.Timestamp.now().strftime('%d/%m/%Y')}")
-    doc.add_paragraph("-" * 70)
-
-    # 1. Tiêu chuẩn
-    doc.add_heading('I. CÁC TIÊU CHUẨN ÁP DỤNG', level=1)
-    stds = ["TCVN 2737:2023: Tải trọng và tác động", "TCVN 5574:2018: Kết cấu bê tông cốt thép", "TCVN 9386:2012: Thiết kế kháng chấn", "TCVN 10304:2014: Móng cọc"]
-    for s in stds: doc.add_paragraph(s, style='List Bullet')
-
-    # 2. Vật liệu
-    doc.add_heading('II. THÔNG SỐ VẬT LIỆU', level=1)
-    doc.add_paragraph(f"1. Bê tông: {mat_info['conc']} (Rb = {mat_info['rb']} MPa)")
-    doc.add_paragraph(f"2. Cốt thép: {mat_info['steel']} (Rs = {mat_info['rs']} MPa)")
-    doc.add_paragraph(f"3. Tải trọng sàn quy đổi: q = {load_info} kN/m2")
-
-    # 3. Kết quả
-    doc.add_heading('III. KẾT QUẢ TÍNH TOÁN', level=1)
-    
-    def add_df(df, title):
-        doc.add_heading(title, level=2)
-        if df.empty:
-            doc.add_paragraph("Không áp dụng")
-            return
-        t = doc.add_table(df.shape[0]+1, df.shape[1])
-        t.style = 'Table Grid'
-        for j, col in enumerate(df.columns): t.cell(0, j).text = str(col)
-        for i, row in enumerate(df.itertuples(index=False)):
-            for j, val in enumerate(row): t.cell(i+1, j).text = str(val)
-        doc.add_paragraph("")
-
-    add_df(design_results['San'], "1. Sàn (Slab)")
-    add_df(design_results['Dam'], "2. Dầm (Beam)")
-    add_df(design_results['Cot'], "3. Cột (Column)")
-    if 'Vach' in design_results: add_df(design_results['Vach'], "4. Vách (Wall)")
-    add_df(design_results['Mong'], "5. Móng (Foundation)")
-
-    doc.add_heading('IV. KẾT LUẬN', level=1)
-    doc.add_paragraph("Phương án đảm bảo khả năng chịu lực sơ bộ. Cần kiểm toán chi tiết trong giai đoạn TKKT.")
-    
-    bio = io.BytesIO()
-    doc.save(bio)
-    return bio.getvalue()
-
 # Hàm hỗ trợ khác
 def color_status(val):
     color = 'red'
@@ -95,42 +52,16 @@ def color_status(val):
     elif val == '⚠️ DƯ': color = '#B7950B'
     return f'color: {color}; font-weight: bold'
 
-def parse_input_string(input_str):
-    try:
-        items = input_str.split(',')
-        result = []
-        for item in items:
-            item = item.strip().lower()
-            if 'x' in item:
-                val, count = item.split('x')
-                result.extend([float(val)] * int(count))
-            else:
-                if item: result.append(float(item))
-        return result
-    except:
-        return []
-
-def to_excel(dfs):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        for sheet_name, df in dfs.items():
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-            worksheet = writer.sheets[sheet_name]
-            for i, col in enumerate(df.columns):
-                col_len = max(df[col].astype(str).map(len).max(), len(col)) + 2
-                worksheet.set_column(i, i, col_len)
-    return output.getvalue()
-
-# Data chuẩn
-RB_MAP = {"B15": 8.5, "B20": 11.5, "B25": 14.5, "B30": 17.0, "B35": 19.5, "B40": 22.0, "B45": 25.0, "B50": 27.5}
-RS_MAP = {"CB240-T": 210, "CB300-T": 260, "CB300-V": 260, "CB400-V": 350, "CB500-V": 435, "CB600-V": 520}
-Q_DEFAULTS = {"Nhà phố/Biệt thự": 10.0, "Văn phòng/Khách sạn": 14.0, "Chung cư cao tầng": 14.5}
+def diff_style(df):
+    # Tô nền ô khác phương án gốc (cột đầu)
+    return pd.DataFrame(np.where(diff_mask(df), 'background-color: #FCF3CF; font-weight: bold', ''), index=df.index, columns=df.columns)
 
 # ==========================================
 # 1. SIDEBAR INPUT
 # ==========================================
+input_errors = []
 with st.sidebar:
-    st.image("https://img.icons8.com/color/96/000000/structural.png", width=60)
+    st.image(LOGO, width=60)
     st.title("THIẾT LẬP DỰ ÁN")
     
     with st.expander("1. Thông Tin Chung", expanded=True):
@@ -151,21 +82,26 @@ with st.sidebar:
         if height_mode == "Điển hình":
             num_floors = st.number_input("Tổng số tầng", 1, 100, 10)
             h_typ = st.number_input("Chiều cao điển hình (m)", 2.0, 6.0, 3.3)
-            floor_heights = [h_typ] * num_floors
+            floor_segs = [(h_typ, num_floors)]
         else:
             h_str = st.text_input("Nhập chuỗi (VD: 4.5, 3.3x9)", "4.5, 3.3x9")
-            floor_heights = parse_input_string(h_str)
-            num_floors = len(floor_heights)
-            st.caption(f"Tổng: {num_floors} tầng | Cao: {sum(floor_heights):.1f}m")
+            try:
+                with prof.stage("parse"): floor_segs = parse_segments(h_str)
+            except ValueError as e:
+                floor_segs = []; input_errors.append(f"Cao độ tầng - {e}")
+            num_floors = sum(n for _, n in floor_segs)
+            st.caption(f"Tổng: {num_floors} tầng | Cao: {sum(v * n for v, n in floor_segs):.1f}m")
         st.markdown("---")
         st.markdown("**B. Lưới trục (m):**")
         grid_x_str = st.text_input("Khoảng cách trục X", "6, 7, 6")
         grid_y_str = st.text_input("Khoảng cách trục Y", "5, 5, 5")
-        lx_list = parse_input_string(grid_x_str)
-        ly_list = parse_input_string(grid_y_str)
-        l_max = max(max(lx_list, default=0), max(ly_list, default=0))
-        l_min = min(max(lx_list, default=0), max(ly_list, default=0))
-        area_trib = max(lx_list, default=0) * max(ly_list, default=0)
+        lx_list = ly_list = []
+        with prof.stage("parse"):
+            # Lưới trục vẫn trải ra: mỗi trục là một đường lưới, mỗi giao điểm là một cột
+            try: lx_list = parse_input_string(grid_x_str)
+            except ValueError as e: input_errors.append(f"Trục X - {e}")
+            try: ly_list = parse_input_string(grid_y_str)
+            except ValueError as e: input_errors.append(f"Trục Y - {e}")
 
     with st.expander("3. Thông Số Vật Liệu", expanded=False):
         conc_opts = list(RB_MAP.keys()) + ["Tùy chỉnh..."]
@@ -202,88 +138,63 @@ with st.sidebar:
     with st.expander("4. Cấu Kiện Cột", expanded=False):
         col_shape = st.radio("Hình dạng:", ["Chữ nhật", "Vuông"], horizontal=True)
         col_orient = st.radio("Phương cột CN:", ["Dọc nhà (Theo Y)", "Ngang nhà (Theo X)"], index=0)
-        b_col_fixed = st.number_input("Cạnh b cố định (mm)", 150, 1000, 220, step=10)
+        b_col_fixed = st.number_input("Cạnh b cố định (mm)", *B_COL_RANGE, 220, step=10)
         k_safety = 1.15
 
     with st.expander("5. Cấu Kiện Móng", expanded=False):
-        found_type = st.selectbox("Loại móng", ["Móng Cọc (Pile)", "Móng Đơn/Băng"])
-        if found_type == "Móng Cọc (Pile)":
-            pile_std = ["Vuông 200x200", "Vuông 250x250", "Vuông 300x300", "Vuông 350x350", "Vuông 400x400", "Ly tâm D300", "Ly tâm D350", "Ly tâm D400", "Ly tâm D500", "Ly tâm D600", "Khoan nhồi D800", "Khoan nhồi D1000", "Tùy chỉnh..."]
+        found_type = st.selectbox("Loại móng", [FOUND_PILE, FOUND_SHALLOW])
+        if found_type == FOUND_PILE:
+            pile_std = PILE_STD + ["Tùy chỉnh..."]
             pile_sel = st.selectbox("Chọn loại cọc", pile_std, index=2)
             if pile_sel == "Tùy chỉnh...":
                 d_pile = st.number_input("Kích thước/Đường kính cọc (mm)", 100, 2000, 400)
                 pile_type = f"D{d_pile} (Custom)"
             else:
                 pile_type = pile_sel
-                if "Vuông" in pile_sel: d_pile = int(pile_sel.split(' ')[1].split('x')[0])
-                elif "D" in pile_sel: d_pile = int(pile_sel.split('D')[1])
-                else: d_pile = 400
+                d_pile = pile_diameter(pile_sel)
             p_pile = st.number_input("Sức chịu tải TK (Tấn)", 10, 2000, 45)
+            found_kw = dict(pile_type=pile_type, d_pile=d_pile, p_pile=p_pile)
         else:
             r_dat = st.number_input("Cường độ đất nền R (kg/cm2)", 0.5, 10.0, 1.5)
+            found_kw = dict(r_dat=r_dat)
+
+    st.toggle("🩺 Đo hiệu năng", key="profiling", help="Đo thời gian từng bước mỗi lần chạy, xem ở cuối trang")
 
 # ==========================================
-# 2. ENGINE (FIXED LOOP)
+# 2. ENGINE (xem engine.py)
 # ==========================================
-hs_calc = (l_min * 1000) / 35
-hs_select = max(100, math.ceil(hs_calc / 10) * 10)
-df_slab = pd.DataFrame([{"Cấu kiện": "Sàn điển hình", "Hoạt tải (kN/m2)": q_load, "Nhịp ngắn L (m)": l_min, "Công thức": "L/35", "Chiều dày YC (mm)": hs_calc, "Chiều dày CHỌN (mm)": int(hs_select), "Hệ số AT": hs_select/hs_calc if hs_calc else 0, "Trạng thái": "✅ ĐẠT" if hs_select >= hs_calc else "⛔ KHÔNG ĐẠT"}])
-
-hd_calc = (l_max * 1000) / 12; hd_select = math.ceil(hd_calc / 50) * 50
-bd_calc = 0.4 * hd_select; bd_select = max(200, math.ceil(bd_calc / 50) * 50)
-if hd_select >= 700 and bd_select < 300: bd_select = 300
-hd_sec = (l_max * 1000) / 16; hd_sec_s = math.ceil(hd_sec / 50) * 50
-bd_sec_s = max(200, math.ceil(0.4 * hd_sec_s / 50) * 50)
-df_beam = pd.DataFrame([
-    {"Cấu kiện": "Dầm khung chính", "Nhịp lớn L (m)": l_max, "Công thức": "L/12", "Chiều cao YC (mm)": hd_calc, "Tiết diện CHỌN (mm)": f"{int(bd_select)}x{int(hd_select)}", "Hệ số AT": hd_select/hd_calc if hd_calc else 0, "Trạng thái": "✅ ĐẠT"},
-    {"Cấu kiện": "Dầm phụ", "Nhịp lớn L (m)": l_max, "Công thức": "L/16", "Chiều cao YC (mm)": hd_sec, "Tiết diện CHỌN (mm)": f"{int(bd_sec_s)}x{int(hd_sec_s)}", "Hệ số AT": hd_sec_s/hd_sec if hd_sec else 0, "Trạng thái": "✅ ĐẠT"}
-])
-
-# FIX: Vòng lặp chuẩn, không dùng list comprehension để tránh in NULL
-col_schedule = []
-floors = list(range(1, num_floors + 1))[::-1]
-group_map = {}
-for f in floors:
-    idx = (f - 1) // 3
-    if idx not in group_map: group_map[idx] = []
-    group_map[idx].append(f)
-
-for grp_id in sorted(group_map.keys(), reverse=True):
-    floor_list = group_map[grp_id]
-    n_supported = num_floors - min(floor_list) + 1
-    N_calc = k_safety * q_load * area_trib * n_supported
-    Ac_req = (N_calc * 1000) / rb
-    if col_shape == "Vuông":
-        side = math.sqrt(Ac_req); b_sel = h_sel = math.ceil(side / 50) * 50
-    else:
-        h_req = Ac_req / b_col_fixed; h_sel = math.ceil(h_req / 50) * 50; b_sel = b_col_fixed
-    if h_sel < 200: h_sel = 200
-    if b_sel < 200: b_sel = 200
-    status = "✅ ĐẠT" if (b_sel * h_sel) >= Ac_req else "⛔ KHÔNG ĐẠT"
-    col_schedule.append({"Vị trí": f"Tầng {min(floor_list)}-{max(floor_list)}", "Tải N (kN)": N_calc, "A_yc (cm2)": Ac_req/100, "Tiết diện": f"{int(b_sel)}x{int(h_sel)}", "A_chon (cm2)": int(b_sel*h_sel/100), "Ratio": (b_sel*h_sel)/Ac_req if Ac_req else 0, "Trạng thái": status})
-df_col = pd.DataFrame(col_schedule).iloc[::-1].reset_index(drop=True)
-
-df_wall = pd.DataFrame()
-if has_shearwall:
-    h_max = max(floor_heights) if floor_heights else 3.3
-    tw_calc = h_max * 1000 / 20; tw_select = max(200, math.ceil(tw_calc / 50) * 50)
-    df_wall = pd.DataFrame([{"Cấu kiện": "Vách cứng điển hình", "Chiều cao tầng H (m)": h_max, "Công thức": "H/20", "Chiều dày YC (mm)": tw_calc, "Chiều dày CHỌN (mm)": int(tw_select), "Hệ số AT": tw_select/tw_calc if tw_calc else 0, "Trạng thái": "✅ ĐẠT"}])
-
-N_footing = df_col.iloc[-1]["Tải N (kN)"] * 1.1 if not df_col.empty else 0
-mong_desc = ""; mong_detail = ""
-if found_type == "Móng Cọc (Pile)":
-    n_pile_calc = N_footing / (p_pile * 9.81); n_pile = math.ceil(n_pile_calc * 1.2)
-    spacing = 3 * (d_pile/1000); edge = 0.7 * (d_pile/1000)
-    w = l = round(math.sqrt(n_pile * spacing**2), 1) if n_pile > 4 else round(spacing + d_pile/1000 + 2*edge, 2)
-    mong_desc = f"{n_pile} cọc {pile_type}"; mong_detail = f"Đài {w}x{l}m (P={p_pile}T)"
-    df_found = pd.DataFrame([{"Cấu kiện": f"Móng ({found_type})", "Tải chân cột N (kN)": N_footing, "Sức chịu tải P (T)": p_pile, "Số cọc YC": n_pile_calc, "Số cọc CHỌN": int(n_pile), "Kích thước / Ghi chú": mong_detail, "Trạng thái": "✅ ĐẠT"}])
-else:
-    R_convert = r_dat * 100; F_req = N_footing / (R_convert - 20); side = math.ceil(math.sqrt(F_req)*10)/10
-    mong_desc = f"Móng đơn B={side}m"; mong_detail = f"R={r_dat}kg/cm2"
-    df_found = pd.DataFrame([{"Cấu kiện": f"Móng ({found_type})", "Tải chân cột N (kN)": N_footing, "R đất (kg/cm2)": r_dat, "Diện tích YC (m2)": F_req, "Diện tích CHỌN (m2)": side*side, "Kích thước / Ghi chú": mong_detail, "Trạng thái": "✅ ĐẠT"}])
-
-data_collection = {"San": df_slab, "Dam": df_beam, "Cot": df_col, "Mong": df_found}
-if not df_wall.empty: data_collection["Vach"] = df_wall
+if not input_errors and not (floor_segs and lx_list and ly_list): input_errors.append("Cần ít nhất một tầng và một nhịp mỗi phương.")
+if input_errors:
+    st.error("**Dữ liệu nhập chưa hợp lệ:**\n\n" + "\n".join(f"- {m}" for m in input_errors))
+    st.stop()
+design_input = DesignInput(lx_list, ly_list, floor_segs, q_load=q_load, rb=rb, col_shape=col_shape, b_col_fixed=b_col_fixed, k_safety=k_safety, has_shearwall=has_shearwall, found_type=found_type, **found_kw)
+# Đồ thị phụ thuộc của phiên: chỉ các nút phía dưới widget vừa đổi được tính lại (xem mục chẩn đoán)
+def column_section(columns, col_shape, col_orient):
+    df_col = columns[0]
+    if df_col.empty: return 0.2, 0.2
+    dim1 = df_col["b (mm)"].iat[0] / 1000; dim2 = df_col["h (mm)"].iat[0] / 1000
+    if col_shape == "Vuông": return dim1, dim1
+    if col_orient == "Ngang nhà (Theo X)": return max(dim1, dim2), min(dim1, dim2)
+    return min(dim1, dim2), max(dim1, dim2)
+
+if 'dep_graph' not in st.session_state:
+    st.session_state.dep_graph = design_graph()
+    st.session_state.dep_graph.add("axes", grid_axes, ["lx_list", "ly_list"])
+    st.session_state.dep_graph.add("section", column_section, ["columns", "col_shape", "col_orient"], cutoff=True)
+    st.session_state.dep_graph.add("fig_plan", lambda axes, sec, beam: plan_figure(*axes, *sec, f"Dầm {int(beam[1]['bd_select'])}x{int(beam[1]['hd_select'])}"), ["axes", "section", "beam"])
+    st.session_state.dep_graph.add("fig_elev", lambda axes, floors, sec: elevation_figure(axes[0], axes[1], floors, sec[0], 0), ["axes", "floors", "section"])
+    st.session_state.dep_graph.add("pile_layout", lambda td, *sel: footing_layout(td, selected=sel), ["takedown", "pile_type", "d_pile", "p_pile"])
+graph = st.session_state.dep_graph.begin().set(**design_inputs(design_input), col_orient=col_orient)
+with prof.stage("engine"): design = graph.get("design")
+prof.count("takedown: bytes", design.takedown.nbytes)
+df_slab, df_beam, df_col, df_wall, df_found = design.slab, design.beam, design.col, design.wall, design.found
+hs_calc, hs_select = design.info["hs_calc"], design.info["hs_select"]
+hd_calc, hd_select, bd_select = design.info["hd_calc"], design.info["hd_select"], design.info["bd_select"]
+mong_desc = design.info["mong_desc"]
+df_pile_layout = None
+if found_type == FOUND_PILE:
+    with prof.stage("pile_layout"): df_pile_layout = graph.get("pile_layout")
+data_collection = design.tables(df_pile_layout)
 
 # ==========================================
 # 3. UI
@@ -291,108 +202,85 @@ if not df_wall.empty: data_collection["Vach"] = df_wall
 st.title(f"📐 {project_name.upper()}")
 st.markdown(f"**Loại:** {project_type} | **Vật liệu:** BT {conc_grade} (Rb={rb}), Thép {steel_main} (Rs={rs})")
 
-tab1, tab2 = st.tabs(["📊 BẢN VẼ & BẢNG TÍNH", "📝 THUYẾT MINH"])
-
-# FIX: Vòng lặp chuẩn cho Graphics
-cum_x = [0]; grid_labels_x = ["1"]
-for i, val in enumerate(lx_list): cum_x.append(cum_x[-1] + val); grid_labels_x.append(str(i + 2))
-cum_y = [0]; grid_labels_y = ["A"]
-for i, val in enumerate(ly_list): cum_y.append(cum_y[-1] + val); grid_labels_y.append(chr(65 + i + 1))
-cum_z = [0]; level_labels = ["Móng"]
-for i, val in enumerate(floor_heights): cum_z.append(cum_z[-1] + val); level_labels.append(f"Tầng {i+1}" if i < len(floor_heights)-1 else "Mái")
+tab1, tab2, tab3, tab4 = st.tabs(["📊 BẢN VẼ & BẢNG TÍNH", "📝 THUYẾT MINH", "🔬 QUÉT PHƯƠNG ÁN", "🗂️ SO SÁNH PHƯƠNG ÁN"])
 
-if not df_col.empty:
-    c_dim = df_col.iloc[0]["Tiết diện"].split('x')
-    dim1 = float(c_dim[0])/1000; dim2 = float(c_dim[1])/1000
-    if col_shape == "Vuông": bc_m, hc_m = dim1, dim1
-    else:
-        if col_orient == "Ngang nhà (Theo X)": bc_m, hc_m = max(dim1, dim2), min(dim1, dim2)
-        else: bc_m, hc_m = min(dim1, dim2), max(dim1, dim2)
-else: bc_m = hc_m = 0.2
-
-if st.session_state.current_floor_idx >= len(floor_heights): st.session_state.current_floor_idx = len(floor_heights) - 1
+if st.session_state.current_floor_idx >= num_floors: st.session_state.current_floor_idx = num_floors - 1
 if st.session_state.current_floor_idx < 0: st.session_state.current_floor_idx = 0
-current_z = cum_z[st.session_state.current_floor_idx + 1]
-current_label = level_labels[st.session_state.current_floor_idx + 1]
 
-with tab1:
+def step_floor(delta, n_floors):
+    st.session_state.current_floor_idx = min(max(st.session_state.current_floor_idx + delta, 0), n_floors - 1)
+
+# Chuyển tầng chỉ chạy lại fragment này: hình lấy từ đồ thị (đã cache) và chỉ vá phần tầng đang xem
+@st.fragment
+def floor_navigator(graph, takedown, prof):
+    # Chạy cùng lần chạy đầy đủ thì ghi vào bộ đo chung, chạy lại riêng thì thành một mục "fragment"
+    run_prof = prof.rerun("fragment")
+    floor_idx = st.session_state.current_floor_idx
+    floor_segs = graph.get("floors")
+    n_floors = sum(n for _, n in floor_segs)
+    current_z = float(level_z(floor_segs, [floor_idx + 1])[0])
+    current_label = level_label(floor_idx + 1, n_floors)
     c_nav1, c_nav2, c_nav3 = st.columns([1, 2, 1])
     with c_nav2:
         col_btn1, col_info, col_btn2 = st.columns([1, 2, 1])
-        if col_btn1.button("⬇️ Xuống tầng", use_container_width=True):
-            if st.session_state.current_floor_idx > 0: st.session_state.current_floor_idx -= 1; st.rerun()
+        col_btn1.button("⬇️ Xuống tầng", use_container_width=True, on_click=step_floor, args=(-1, n_floors))
         col_info.markdown(f"<div style='text-align:center; font-weight:bold; font-size:18px; color:#2E86C1; border: 1px solid #ddd; padding: 5px; border-radius: 5px;'>{current_label} (+{current_z:.2f}m)</div>", unsafe_allow_html=True)
-        if col_btn2.button("⬆️ Lên tầng", use_container_width=True):
-            if st.session_state.current_floor_idx < len(floor_heights) - 1: st.session_state.current_floor_idx += 1; st.rerun()
+        col_btn2.button("⬆️ Lên tầng", use_container_width=True, on_click=step_floor, args=(1, n_floors))
 
     col_plan, col_elev = st.columns([1, 1])
     with col_plan:
         st.markdown(f'<p class="header-style">📍 PLAN VIEW</p>', unsafe_allow_html=True)
-        fig_plan = go.Figure()
-        for x, label in zip(cum_x, grid_labels_x):
-            fig_plan.add_trace(go.Scatter(x=[x, x], y=[min(cum_y)-1, max(cum_y)+1], mode='lines+text', line=dict(color='#BDC3C7', width=1, dash='dash'), text=[None, label], textposition="top center", hoverinfo='skip'))
-            fig_plan.add_trace(go.Scatter(x=[x], y=[min(cum_y)-1], mode='markers+text', marker=dict(size=25, color='white', line=dict(color='black', width=1)), text=label, textposition="middle center", showlegend=False, hoverinfo='skip'))
-        for y, label in zip(cum_y, grid_labels_y):
-            fig_plan.add_trace(go.Scatter(x=[min(cum_x)-1, max(cum_x)+1], y=[y, y], mode='lines+text', line=dict(color='#BDC3C7', width=1, dash='dash'), text=[None, label], textposition="middle right", hoverinfo='skip'))
-            fig_plan.add_trace(go.Scatter(x=[min(cum_x)-1], y=[y], mode='markers+text', marker=dict(size=25, color='white', line=dict(color='black', width=1)), text=label, textposition="middle center", showlegend=False, hoverinfo='skip'))
-        bx, by = [], []
-        for y in cum_y: bx.extend([min(cum_x), max(cum_x), None]); by.extend([y, y, None])
-        for x in cum_x: bx.extend([x, x, None]); by.extend([min(cum_y), max(cum_y), None])
-        fig_plan.add_trace(go.Scatter(x=bx, y=by, mode='lines', line=dict(color='#2980B9', width=3), name='Dầm', hoverinfo='text', hovertext=f"Dầm {int(bd_select)}x{int(hd_select)}"))
-        shapes = []
-        for x in cum_x:
-            for y in cum_y: shapes.append(dict(type="rect", x0=x-bc_m/2, y0=y-hc_m/2, x1=x+bc_m/2, y1=y+hc_m/2, fillcolor="#E74C3C", line=dict(width=0)))
-        fig_plan.update_layout(shapes=shapes, xaxis=dict(visible=False, fixedrange=False, range=[min(cum_x)-2, max(cum_x)+2]), yaxis=dict(visible=False, scaleanchor="x", fixedrange=False, range=[min(cum_y)-2, max(cum_y)+2]), margin=dict(l=10,r=10,t=10,b=10), height=500, dragmode="pan", showlegend=False)
-        st.plotly_chart(fig_plan, use_container_width=True, config={'scrollZoom': True, 'displayModeBar': True})
+        with run_prof.stage("fig_plan"): fig_plan = graph.get("fig_plan")
+        run_prof.figure("fig_plan", fig_plan)
+        with run_prof.stage("plotly_chart"): st.plotly_chart(fig_plan, use_container_width=True, config={'scrollZoom': True, 'displayModeBar': True})
 
     with col_elev:
         st.markdown('<p class="header-style">📐 ELEVATION VIEW (TRỤC 1)</p>', unsafe_allow_html=True)
-        fig_elev = go.Figure()
-        x_min, x_max = min(cum_x) - 1, max(cum_x) + 1
-        for i, z in enumerate(cum_z):
-            label = level_labels[i]
-            is_active = (i == st.session_state.current_floor_idx + 1)
-            line_color = '#E74C3C' if is_active else '#7F8C8D'
-            line_width = 3 if is_active else 1
-            text_weight = "<b>" if is_active else ""
-            text_end = "</b>" if is_active else ""
-            fig_elev.add_trace(go.Scatter(x=[x_min, x_max + 1.5], y=[z, z], mode='lines', line=dict(color=line_color, width=line_width, dash='solid' if is_active else 'dot'), hoverinfo='skip'))
-            marker_x = x_max + 1.5
-            fig_elev.add_trace(go.Scatter(x=[marker_x], y=[z], mode='markers', marker=dict(symbol='triangle-down', size=15, color=line_color, line=dict(width=1, color=line_color)), hoverinfo='skip', showlegend=False))
-            fig_elev.add_trace(go.Scatter(x=[marker_x], y=[z + 0.2], mode='text', text=[f"{text_weight}{label} (+{z:.2f}){text_end}"], textposition="top center", textfont=dict(color=line_color, size=12 if not is_active else 14), hoverinfo='skip', showlegend=False))
-        for x, label in zip(cum_x, grid_labels_x):
-            fig_elev.add_trace(go.Scatter(x=[x, x], y=[-1, max(cum_z)+1], mode='lines', line=dict(color='#BDC3C7', width=1, dash='dash'), showlegend=False, hoverinfo='skip'))
-            fig_elev.add_trace(go.Scatter(x=[x], y=[-1.5], mode='markers+text', marker=dict(size=25, color='white', line=dict(color='black', width=1)), text=label, textposition="middle center", showlegend=False))
-        shapes_elev = []
-        for x in cum_x: shapes_elev.append(dict(type="rect", x0=x-bc_m/2, y0=0, x1=x+bc_m/2, y1=max(cum_z), fillcolor="#BDC3C7", opacity=0.5, line=dict(width=0)))
-        for z in cum_z[1:]:
-            for j in range(len(cum_x)-1): shapes_elev.append(dict(type="rect", x0=cum_x[j], y0=z-0.5, x1=cum_x[j+1], y1=z, fillcolor="#3498DB", opacity=0.5, line=dict(width=0)))
-        fig_elev.update_layout(shapes=shapes_elev, xaxis=dict(visible=False, fixedrange=False, range=[x_min-1, x_max+4]), yaxis=dict(visible=False, scaleanchor="x", fixedrange=False, range=[-2, max(cum_z)+2]), margin=dict(l=10,r=10,t=10,b=10), height=500, dragmode="pan", showlegend=False)
-        st.plotly_chart(fig_elev, use_container_width=True, config={'scrollZoom': True, 'displayModeBar': True})
+        with run_prof.stage("fig_elev"):
+            fig_elev = graph.get("fig_elev")
+            highlight_level(fig_elev, graph.get("axes")[0], floor_segs, lod_levels(floor_segs), floor_idx + 1)
+        run_prof.figure("fig_elev", fig_elev)
+        with run_prof.stage("plotly_chart"): st.plotly_chart(fig_elev, use_container_width=True, config={'scrollZoom': True, 'displayModeBar': True})
+
+    with st.expander(f"🔎 Chi tiết cột theo nút lưới — {current_label}", expanded=False):
+        df_node = takedown_table(takedown, floor_idx)
+        with run_prof.stage("style"): st.dataframe(display_table(df_node).style.map(color_status, subset=['Trạng thái']), use_container_width=True, hide_index=True, column_config={"Diện tích TT (m2)": st.column_config.NumberColumn(format="%.2f"), "Tải N (kN)": st.column_config.NumberColumn(format="%.2f"), "A_yc (cm2)": st.column_config.NumberColumn(format="%.2f"), "A_chon (cm2)": st.column_config.NumberColumn(format="%d"), "Ratio": st.column_config.NumberColumn("HS An Toàn", format="%.2f")})
+    if run_prof is not prof: run_prof.finish()
+
+with tab1:
+    floor_navigator(graph, design.takedown, prof)
 
     st.markdown("---")
     
     col_h1, col_h2 = st.columns([3, 1])
     with col_h1: st.markdown('<p class="main-header">BẢNG TỔNG HỢP & KIỂM TRA KẾT QUẢ TÍNH TOÁN</p>', unsafe_allow_html=True)
-    with col_h2: st.download_button("📥 Xuất Excel", data=to_excel(data_collection), file_name=f"{project_name}_Calc.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    with col_h2: st.download_button("📥 Xuất Excel", data=prof.wrap("excel", partial(excel_bytes, data_collection)), file_name=f"{project_name}_Calc.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
     st.markdown('<p class="sub-header">🟦 1. KẾT CẤU BẢN SÀN (SLAB CHECK)</p>', unsafe_allow_html=True)
-    st.dataframe(df_slab.style.map(color_status, subset=['Trạng thái']), use_container_width=True, hide_index=True, column_config={"Hoạt tải (kN/m2)": st.column_config.NumberColumn(format="%.2f"), "Nhịp ngắn L (m)": st.column_config.NumberColumn(format="%.2f"), "Chiều dày YC (mm)": st.column_config.NumberColumn(format="%.2f"), "Chiều dày CHỌN (mm)": st.column_config.NumberColumn(format="%d"), "Hệ số AT": st.column_config.NumberColumn(format="%.2f")})
+    with prof.stage("style"): st.dataframe(display_table(df_slab).style.map(color_status, subset=['Trạng thái']), use_container_width=True, hide_index=True, column_config={"Hoạt tải (kN/m2)": st.column_config.NumberColumn(format="%.2f"), "Nhịp ngắn L (m)": st.column_config.NumberColumn(format="%.2f"), "Chiều dày YC (mm)": st.column_config.NumberColumn(format="%.2f"), "Chiều dày CHỌN (mm)": st.column_config.NumberColumn(format="%d"), "Hệ số AT": st.column_config.NumberColumn(format="%.2f")})
 
     st.markdown('<p class="sub-header">🟩 2. KẾT CẤU DẦM KHUNG (BEAM CHECK)</p>', unsafe_allow_html=True)
-    st.dataframe(df_beam.style.map(color_status, subset=['Trạng thái']), use_container_width=True, hide_index=True, column_config={"Nhịp lớn L (m)": st.column_config.NumberColumn(format="%.2f"), "Chiều cao YC (mm)": st.column_config.NumberColumn(format="%.2f"), "Hệ số AT": st.column_config.NumberColumn(format="%.2f")})
+    with prof.stage("style"): st.dataframe(display_table(df_beam).style.map(color_status, subset=['Trạng thái']), use_container_width=True, hide_index=True, column_config={"Nhịp lớn L (m)": st.column_config.NumberColumn(format="%.2f"), "Chiều cao YC (mm)": st.column_config.NumberColumn(format="%.2f"), "Hệ số AT": st.column_config.NumberColumn(format="%.2f")})
 
     st.markdown('<p class="sub-header">🟥 3. KẾT CẤU CỘT (COLUMN SCHEDULE & CHECK)</p>', unsafe_allow_html=True)
-    st.dataframe(df_col.style.map(color_status, subset=['Trạng thái']), use_container_width=True, hide_index=True, column_config={"Vị trí": st.column_config.TextColumn("Zone Tầng", width="small"), "Tải N (kN)": st.column_config.ProgressColumn("Lực Dọc N (kN)", format="%.2f", min_value=0, max_value=int(df_col["Tải N (kN)"].max()*1.1)), "A_yc (cm2)": st.column_config.NumberColumn("Diện tích YC", format="%.2f"), "A_chon (cm2)": st.column_config.NumberColumn("Diện tích CHỌN", format="%d"), "Ratio": st.column_config.NumberColumn("HS An Toàn", format="%.2f")})
+    with prof.stage("style"): st.dataframe(display_table(df_col).style.map(color_status, subset=['Trạng thái']), use_container_width=True, hide_index=True, column_config={"Vị trí": st.column_config.TextColumn("Zone Tầng", width="small"), "Tải N (kN)": st.column_config.ProgressColumn("Lực Dọc N (kN)", format="%.2f", min_value=0, max_value=int(df_col["Tải N (kN)"].max()*1.1)), "A_yc (cm2)": st.column_config.NumberColumn("Diện tích YC", format="%.2f"), "A_chon (cm2)": st.column_config.NumberColumn("Diện tích CHỌN", format="%d"), "Ratio": st.column_config.NumberColumn("HS An Toàn", format="%.2f")})
 
     if has_shearwall and not df_wall.empty:
         st.markdown('<p class="sub-header">🟧 4. KẾT CẤU VÁCH CỨNG (SHEAR WALL)</p>', unsafe_allow_html=True)
-        st.dataframe(df_wall.style.map(color_status, subset=['Trạng thái']), use_container_width=True, hide_index=True, column_config={"Chiều cao tầng H (m)": st.column_config.NumberColumn(format="%.2f"), "Chiều dày YC (mm)": st.column_config.NumberColumn(format="%.2f"), "Chiều dày CHỌN (mm)": st.column_config.NumberColumn(format="%d"), "Hệ số AT": st.column_config.NumberColumn(format="%.2f")})
+        with prof.stage("style"): st.dataframe(display_table(df_wall).style.map(color_status, subset=['Trạng thái']), use_container_width=True, hide_index=True, column_config={"Chiều cao tầng H (m)": st.column_config.NumberColumn(format="%.2f"), "Chiều dày YC (mm)": st.column_config.NumberColumn(format="%.2f"), "Chiều dày CHỌN (mm)": st.column_config.NumberColumn(format="%d"), "Hệ số AT": st.column_config.NumberColumn(format="%.2f")})
 
     st.markdown('<p class="sub-header">🟫 5. KẾT CẤU MÓNG (FOUNDATION CHECK)</p>', unsafe_allow_html=True)
     mong_fmt = {"Tải chân cột N (kN)": st.column_config.NumberColumn(format="%.2f"), "Sức chịu tải P (T)": st.column_config.NumberColumn(format="%.2f"), "Số cọc YC": st.column_config.NumberColumn(format="%.2f"), "Số cọc CHỌN": st.column_config.NumberColumn(format="%d")}
-    if found_type != "Móng Cọc (Pile)": mong_fmt = {"Tải chân cột N (kN)": st.column_config.NumberColumn(format="%.2f"), "R đất (kg/cm2)": st.column_config.NumberColumn(format="%.2f"), "Diện tích YC (m2)": st.column_config.NumberColumn(format="%.2f"), "Diện tích CHỌN (m2)": st.column_config.NumberColumn(format="%.2f")}
-    st.dataframe(df_found.style.map(color_status, subset=['Trạng thái']), use_container_width=True, hide_index=True, column_config=mong_fmt)
+    if found_type != FOUND_PILE: mong_fmt = {"Tải chân cột N (kN)": st.column_config.NumberColumn(format="%.2f"), "R đất (kg/cm2)": st.column_config.NumberColumn(format="%.2f"), "Diện tích YC (m2)": st.column_config.NumberColumn(format="%.2f"), "Diện tích CHỌN (m2)": st.column_config.NumberColumn(format="%.2f")}
+    with prof.stage("style"): st.dataframe(display_table(df_found).style.map(color_status, subset=['Trạng thái']), use_container_width=True, hide_index=True, column_config=mong_fmt)
+    if found_type == FOUND_PILE:
+        with st.expander(f"🧮 Bố trí cọc tối ưu cho từng đài ({len(df_pile_layout)} nút, toàn bộ danh mục cọc)", expanded=False):
+            n_fail = int((df_pile_layout["Trạng thái"] != OK).sum())
+            st.caption(f"Mỗi nút chọn phương án rẻ nhất (chi phí quy đổi m3 bê tông, cọc dài {PILE_LENGTH:.0f}m) trong {df_pile_layout['Loại cọc'].cat.categories.size} loại cọc x lưới tối đa {MAX_ROWS}x{MAX_ROWS}; khoảng cách cọc 3d, mép đài 0.7d, tải chân cột = N tầng 1 x 1.1. "
+                       f"Sức chịu tải: {pile_type} theo P={p_pile}T ở sidebar, các loại khác theo giá trị tham khảo trong bảng dưới (giả định sơ bộ, cần kiểm tra theo địa chất)." + (f" ⛔ {n_fail} nút vượt phương án lớn nhất." if n_fail else ""))
+            st.dataframe(capacity_table(selected=(pile_type, d_pile, p_pile)), use_container_width=True, hide_index=True, column_config={"P (T)": st.column_config.NumberColumn(format="%.1f")})
+            st.dataframe(layout_summary(df_pile_layout), use_container_width=True, hide_index=True, column_config={"Chi phí quy đổi (m3)": st.column_config.NumberColumn(format="%.1f")})
+            with prof.stage("style"): st.dataframe(display_table(df_pile_layout).style.map(color_status, subset=['Trạng thái']), use_container_width=True, hide_index=True, column_config={"N chân cột (kN)": st.column_config.NumberColumn(format="%.2f"), "H đài (m)": st.column_config.NumberColumn(format="%.2f"), "Chi phí quy đổi (m3)": st.column_config.NumberColumn(format="%.2f"), "Hệ số AT": st.column_config.NumberColumn(format="%.2f")})
 
 with tab2:
     # 4. TAB THUYẾT MINH
@@ -435,10 +323,10 @@ with tab2:
     st.subheader("3. Cột (Column)")
     st.markdown("Tiết diện cột được kiểm tra theo khả năng chịu nén đúng tâm (có kể đến uốn dọc):")
     st.latex(r"A_{yc} = \frac{k \cdot N}{R_b}")
-    st.info(f"Kết quả chi tiết xem bảng tính. Tiết diện điển hình tầng 1: **{df_col.iloc[0]['Tiết diện']} mm**")
+    st.info(f"Kết quả chi tiết xem bảng tính. Tiết diện điển hình tầng 1: **{df_col['b (mm)'].iat[0]}x{df_col['h (mm)'].iat[0]} mm**")
     
     st.subheader("4. Móng (Foundation)")
-    if found_type == "Móng Cọc (Pile)":
+    if found_type == FOUND_PILE:
         st.markdown("Số lượng cọc sơ bộ:")
         st.latex(r"n = \frac{1.2 \cdot N_{chan}}{P_{tk}}")
         st.success(f"👉 **CHỌN: {mong_desc}**")
@@ -448,13 +336,106 @@ with tab2:
         st.success(f"👉 **CHỌN: {mong_desc}**")
 
     st.markdown("---")
-    # Generate Word Doc
+    # Generate Word Doc (chỉ khi bấm tải)
     mat_info = {'conc': conc_grade, 'rb': rb, 'steel': steel_main, 'rs': rs}
-    docx_file = create_docx_report(project_name, project_type, mat_info, q_load, data_collection)
-    
     st.download_button(
         label="📄 Tải Thuyết Minh (.docx)",
-        data=docx_file,
+        data=prof.wrap("docx", partial(docx_bytes, project_name, project_type, mat_info, q_load, data_collection)),
         file_name=f"{project_name}_ThuyetMinh.docx",
         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
     )
+
+with tab3:
+    # 5. TAB QUÉT PHƯƠNG ÁN
+    st.markdown('<p class="main-header">QUÉT PHƯƠNG ÁN & MẶT PARETO</p>', unsafe_allow_html=True)
+    with st.form("sweep_form"):
+        s1, s2 = st.columns(2)
+        sw_grades = s1.multiselect("Mác bê tông", list(RB_MAP.keys()), default=[conc_sel] if conc_sel in RB_MAP else ["B25", "B30"])
+        sw_steels = s2.multiselect("Thép chủ", list(RS_MAP.keys()), default=[main_steel_sel] if main_steel_sel in RS_MAP else ["CB400-V"])
+        sw_b_str = s1.text_input("Cạnh b cột (mm)", f"200, 250, 300, {int(b_col_fixed)}")
+        sw_floor_str = s2.text_input("Số tầng", f"{num_floors}")
+        sw_piles = st.multiselect("Loại cọc", PILE_STD, default=PILE_STD[:5])
+        sw_run = st.form_submit_button("▶️ Chạy quét", use_container_width=True)
+    if sw_run:
+        try:
+            sw_b = sorted({int(v) for v in parse_input_string(sw_b_str)})
+            if bad := [b for b in sw_b if not B_COL_RANGE[0] <= b <= B_COL_RANGE[1]]: raise ValueError(f"Cạnh b cột phải trong khoảng {B_COL_RANGE[0]}-{B_COL_RANGE[1]} mm như ở sidebar (nhận: {', '.join(map(str, bad))})")
+            sw_floors = sorted({int(v) for v in parse_input_string(sw_floor_str) if v >= 1}); sw_err = None
+        except ValueError as e:
+            sw_b = sw_floors = []; sw_err = e
+        if sw_err: st.error(f"Tham số quét - {sw_err}")
+        elif not (sw_grades and sw_steels and sw_piles and sw_b and sw_floors):
+            st.warning("Cần chọn ít nhất một giá trị cho mỗi tham số.")
+        else:
+            t0 = time.perf_counter()
+            with prof.stage("sweep"): st.session_state.sweep_df = run_sweep(design_input, sw_grades, sw_steels, sw_b, sw_piles, sw_floors)
+            st.session_state.sweep_time = time.perf_counter() - t0
+    if "sweep_df" in st.session_state:
+        df_sw = st.session_state.sweep_df
+        df_front = pareto_front(df_sw, by="Số tầng")
+        st.caption(f"{len(df_sw):,} phương án trong {st.session_state.sweep_time:.2f}s | {len(df_front):,} phương án trên mặt Pareto (theo từng số tầng). Thép chủ chưa tham gia công thức sơ bộ nên không làm thay đổi kết quả.")
+        import plotly.graph_objects as go  # chỉ tab quét dùng plotly trực tiếp
+        fig_sw = go.Figure()
+        fig_sw.add_trace(go.Scattergl(x=df_sw["V bê tông (m3)"], y=df_sw["Số cọc"], mode='markers', marker=dict(size=4, color='#BDC3C7'), name='Tất cả', hoverinfo='skip'))
+        fig_sw.add_trace(go.Scattergl(x=df_front["V bê tông (m3)"], y=df_front["Số cọc"], mode='markers', marker=dict(size=9, color=df_front["A cột tầng 1 (m2)"], colorscale='Reds', showscale=True, colorbar=dict(title="A cột (m2)")), name='Pareto',
+                                      text=df_front["Bê tông"].astype(str) + " | b=" + df_front["b cột (mm)"].astype(str) + " | " + df_front["Loại cọc"].astype(str) + " | " + df_front["Số tầng"].astype(str) + " tầng", hoverinfo='text+x+y'))
+        fig_sw.update_layout(xaxis_title="V bê tông (m3)", yaxis_title="Số cọc", margin=dict(l=10,r=10,t=10,b=10), height=450)
+        st.plotly_chart(fig_sw, use_container_width=True)
+        st.dataframe(df_front.sort_values(["Số tầng"] + METRIC_COLS), use_container_width=True, hide_index=True, column_config={"V bê tông (m3)": st.column_config.NumberColumn(format="%.2f"), "A cột tầng 1 (m2)": st.column_config.NumberColumn(format="%.3f")})
+
+with tab4:
+    # 6. TAB SO SÁNH PHƯƠNG ÁN ĐÃ LƯU
+    st.markdown('<p class="main-header">SO SÁNH PHƯƠNG ÁN ĐÃ LƯU</p>', unsafe_allow_html=True)
+    ws = st.session_state.workspace
+    found_label = found_kw["pile_type"] if found_type == FOUND_PILE else f"Móng nông R={found_kw['r_dat']}"
+    with st.form("scenario_form", clear_on_submit=True):
+        sc_default = ws.default_name(f"{conc_grade} | {found_label}")
+        sc_name = st.text_input("Tên phương án", placeholder=sc_default, key="sc_name")
+        if st.form_submit_button("💾 Lưu trạng thái sidebar hiện tại", use_container_width=True):
+            sc_name = sc_name.strip() or sc_default
+            try:
+                ws.save(sc_name, design_input, {"Loại CT": project_type, "Bê tông": conc_grade, "Thép": steel_main, "Móng": found_label}, result=design, layout=df_pile_layout)
+                st.success(f"Đã lưu '{sc_name}'.")
+            except ValueError as e:
+                st.error(str(e))
+    if not len(ws):
+        st.info("Chưa có phương án nào. Chỉnh sidebar rồi bấm lưu; lặp lại để có nhiều phương án so sánh.")
+    else:
+        st.dataframe(ws.inputs_table(), use_container_width=True, hide_index=True)
+        names = list(ws.scenarios)
+        c1, c2 = st.columns([3, 1])
+        sel = c1.multiselect("Phương án so sánh (phương án đầu là gốc)", names, default=names[:4])
+        drop = c2.selectbox("Xoá phương án", ["-"] + names)
+        if c2.button("🗑️ Xoá", disabled=drop == "-"):
+            ws.remove(drop); st.rerun()
+        if sel:
+            computed0 = ws.computed
+            with prof.stage("scenarios"):
+                results = {n: ws.result(n) for n in sel}  # giữ tham chiếu trong lần chạy: LRU có đẩy ra cũng không tính lại giữa các bảng
+                tables = [("Tổng hợp", compare_summary(results)), ("Lịch cột (tiết diện theo nhóm tầng)", compare_columns(results)),
+                          ("Tiết diện dầm", compare_beams(results)), ("Khối lượng móng", compare_foundation(results))]
+            prof.count("scenarios: tính lại", ws.computed - computed0)
+            st.caption(f"{len(ws)} phương án lưu (chỉ dữ liệu vào) | {len(ws.results)}/{ws.results.maxsize} kết quả trong cache | "
+                       f"lần chạy này tính lại {ws.computed - computed0} phương án. Ô tô vàng: khác phương án gốc '{sel[0]}'.")
+            for title, df in tables:
+                st.markdown(f'<p class="sub-header">{title}</p>', unsafe_allow_html=True)
+                st.dataframe(df.style.apply(diff_style, axis=None), use_container_width=True)
+
+# ==========================================
+# 7. CHẨN ĐOÁN HIỆU NĂNG
+# ==========================================
+for node, computed, _ in graph.log:
+    if computed: prof.count(f"tính lại: {node}", 1)
+last_run = prof.finish()
+if last_run:
+    with st.expander("🩺 Chẩn đoán hiệu năng", expanded=False):
+        st.caption(f"Lần chạy này: {last_run['total_s'] * 1000:.1f} ms. Lần chuyển tầng (fragment) và lần tải file được ghi vào lịch sử, hiện ở lần chạy kế tiếp.")
+        d1, d2 = st.columns([2, 1])
+        d1.dataframe(pd.DataFrame({"Bước": list(last_run["stages"]), "Thời gian (ms)": [v * 1000 for v in last_run["stages"].values()]}), use_container_width=True, hide_index=True, column_config={"Thời gian (ms)": st.column_config.ProgressColumn(format="%.2f", min_value=0, max_value=max([v * 1000 for v in last_run["stages"].values()] + [1.0]))})
+        d2.dataframe(pd.DataFrame({"Đếm": list(last_run["counts"]), "Giá trị": list(last_run["counts"].values())}), use_container_width=True, hide_index=True)
+        st.markdown("**Đồ thị phụ thuộc**")
+        st.caption("Đầu vào vừa đổi: " + (", ".join(graph.changed) or "không có") + " → ảnh hưởng: " + (", ".join(n for n in graph.downstream(graph.changed)) or "không có"))
+        st.dataframe(pd.DataFrame([{"Nút": n, "Trạng thái": "🔄 tính lại" if c else "♻️ cache", "Thời gian (ms)": dt * 1000} for n, c, dt in graph.log]).drop_duplicates("Nút"), use_container_width=True, hide_index=True, column_config={"Thời gian (ms)": st.column_config.NumberColumn(format="%.2f")})
+        st.markdown(f"**Lịch sử phiên** ({len(st.session_state.prof_history)} lần gần nhất)")
+        st.dataframe(history_table(st.session_state.prof_history).iloc[::-1], use_container_width=True, hide_index=True, column_config={c: st.column_config.NumberColumn(format="%.2f") for c in ["Tổng (ms)"] + list(last_run["stages"])})
+        st.download_button("📥 Tải lịch sử (JSON)", data=partial(history_json, st.session_state.prof_history, {"project": project_name, "floors": num_floors, "grid": [len(lx_list), len(ly_list)]}), file_name="profile.json", mime="application/json")
@@ -0,0 +1,147 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+from reports import to_excel, create_docx_report
+from piles import design_layout
+from engine import RB_MAP, RS_MAP, Q_DEFAULTS, FOUND_PILE, FOUND_SHALLOW, DesignInput, run_design, parse_input_string, parse_segments, pile_diameter
+
+# ==========================================
+# CHẠY HÀNG LOẠT (KHÔNG CẦN GIAO DIỆN)
+# ==========================================
+# Manifest JSON (list hoặc {"projects": [...]}) / CSV, mỗi dự án dùng các trường như sidebar:
+#   name, type, heights ("4.5, 3.3x9"), grid_x ("6, 7, 6"), grid_y, concrete (B25.. hoặc số Rb),
+#   steel, q_load, col_shape, b_col, shearwall, foundation (pile/shallow), pile, d_pile, p_pile, r_dat
+STAGES = ["parse", "engine", "excel", "docx", "write"]
+
+
+def _flag(val):
+    return str(val).strip().lower() in ("1", "true", "yes", "y", "x", "có")
+
+
+def _material(val, table):
+    val = str(val).strip()
+    if val in table: return val, table[val]
+    return "Custom", float(val)
+
+
+def project_from_record(rec):
+    rec = {k: v for k, v in rec.items() if v not in (None, "")}
+    name = str(rec.get("name", "Dự án"))
+    project_type = str(rec.get("type", "Văn phòng/Khách sạn"))
+    try:
+        floors = parse_segments(str(rec.get("heights", "3.3x10")))
+        lx_list = parse_input_string(str(rec.get("grid_x", "6, 7, 6")))
+        ly_list = parse_input_string(str(rec.get("grid_y", "5, 5, 5")))
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}") from None
+    if not (floors and lx_list and ly_list): raise ValueError(f"{name}: chuỗi cao độ / lưới trục rỗng")
+    conc_grade, rb = _material(rec.get("concrete", "B30"), RB_MAP)
+    steel_main, rs = _material(rec.get("steel", "CB400-V"), RS_MAP)
+    q_load = float(rec.get("q_load", Q_DEFAULTS.get(project_type, 10.0)))
+    found = str(rec.get("foundation", "pile")).strip()
+    found_type = FOUND_SHALLOW if found.lower() in ("shallow", "don", "đơn", FOUND_SHALLOW.lower()) else FOUND_PILE
+    if found_type == FOUND_PILE:
+        pile_type = str(rec.get("pile", "Vuông 300x300"))
+        d_pile = float(rec["d_pile"]) if "d_pile" in rec else pile_diameter(pile_type)
+        found_kw = dict(pile_type=pile_type, d_pile=d_pile, p_pile=float(rec.get("p_pile", 45)))
+    else:
+        found_kw = dict(r_dat=float(rec.get("r_dat", 1.5)))
+    col_shape = "Vuông" if str(rec.get("col_shape", "")).strip().lower() in ("vuông", "vuong", "square") else "Chữ nhật"
+    inp = DesignInput(lx_list, ly_list, floors, q_load=q_load, rb=rb, col_shape=col_shape, b_col_fixed=float(rec.get("b_col", 220)),
+                      has_shearwall=_flag(rec.get("shearwall", False)), found_type=found_type, **found_kw)
+    mat_info = {'conc': conc_grade, 'rb': rb, 'steel': steel_main, 'rs': rs}
+    return name, project_type, mat_info, inp
+
+
+def read_manifest(path):
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+        return
+    data = json.loads(path.read_text(encoding="utf-8"))
+    yield from (data["projects"] if isinstance(data, dict) else data)
+
+
+def safe_name(name):
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "du_an"
+
+
+def unique_stem(rec, row, used):
+    # Tên file duy nhất trong lần chạy (so không phân biệt hoa thường): trùng tên / chỉ khác dấu câu -> thêm số dòng
+    stem = safe_name(str(rec.get("name") or "Dự án"))
+    while stem.lower() in used: stem = f"{stem}_{row}"
+    used.add(stem.lower())
+    return stem
+
+
+def run_project(rec, out_dir, stem):
+    # Chạy trong tiến trình con: file được ghi ngay tại đây, chỉ trả về thời gian từng bước
+    t = {}; t0 = time.perf_counter()
+    try:
+        name, project_type, mat_info, inp = project_from_record(rec)
+        t1 = time.perf_counter(); t["parse"] = t1 - t0
+        result = run_design(inp)
+        tables = result.tables(design_layout(result, inp))  # cùng bộ bảng như nút xuất của app
+        t2 = time.perf_counter(); t["engine"] = t2 - t1
+        base = Path(out_dir) / stem
+        to_excel(tables, target=str(base.with_name(base.name + "_Calc.xlsx")))  # ghi thẳng ra đĩa
+        t3 = time.perf_counter(); t["excel"] = t3 - t2
+        docx = create_docx_report(name, project_type, mat_info, inp.q_load, tables)
+        t4 = time.perf_counter(); t["docx"] = t4 - t3
+        base.with_name(base.name + "_ThuyetMinh.docx").write_bytes(docx)
+        t["write"] = time.perf_counter() - t4
+        return name, t, None
+    except Exception as e:
+        return str(rec.get("name", "?")), t, f"{type(e).__name__}: {e}"
+
+
+def run_batch(records, out_dir, workers=None, log=print):
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    totals = dict.fromkeys(STAGES, 0.0); done = failed = 0
+    t_start = time.perf_counter()
+    records = enumerate(records, 1); used = set()
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        # Giới hạn số việc đang chờ để bộ nhớ không tăng theo kích thước manifest
+        pending = set()
+        while True:
+            while len(pending) < 2 * workers:
+                row, rec = next(records, (None, None))
+                if rec is None: break
+                pending.add(ex.submit(run_project, rec, out_dir, unique_stem(rec, row, used)))
+            if not pending: break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name, t, err = fut.result()
+                done += 1
+                for k, v in t.items(): totals[k] += v
+                if err: failed += 1; log(f"[{done}] ⛔ {name}: {err}")
+                else: log(f"[{done}] ✅ {name} ({sum(t.values()):.2f}s)")
+    elapsed = time.perf_counter() - t_start
+    return {"projects": done, "failed": failed, "elapsed_s": elapsed, "projects_per_s": done / elapsed if elapsed else 0.0,
+            "stage_total_s": totals, "stage_mean_s": {k: v / done if done else 0.0 for k, v in totals.items()}}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Tính sơ bộ hàng loạt dự án từ manifest JSON/CSV và xuất Excel + Word.")
+    ap.add_argument("manifest", help="file .json hoặc .csv")
+    ap.add_argument("-o", "--out", default="output", help="thư mục ghi kết quả (mặc định: output)")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="số tiến trình (mặc định: số CPU)")
+    args = ap.parse_args(argv)
+    summary = run_batch(read_manifest(args.manifest), args.out, args.workers)
+    print(f"\n{summary['projects']} dự án ({summary['failed']} lỗi) trong {summary['elapsed_s']:.2f}s - {summary['projects_per_s']:.2f} dự án/s")
+    for k in STAGES:
+        print(f"  {k:<7} tổng {summary['stage_total_s'][k]:8.3f}s | TB {summary['stage_mean_s'][k] * 1000:8.1f} ms/dự án")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from docx import Document
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from engine import column_takedown, takedown_table  # noqa: E402
+from reports import add_table_bulk  # noqa: E402
+
+# ==========================================
+# BENCHMARK: BẢNG WORD - TỪNG Ô vs BULK XML
+# ==========================================
+# python benchmarks/bench_docx.py [--rows 500 1000 ...] [--legacy-max 2000]
+
+
+def node_schedule(n_rows):
+    # Bảng cột theo nút của cả công trình (lưới 20x20, đủ số tầng để có n_rows dòng)
+    n_floors = -(-n_rows // 441)
+    td = column_takedown([6.0] * 20, [5.0] * 20, n_floors, 14.0, 17.0, "Chữ nhật", 220, 1.15)
+    df = pd.concat([takedown_table(td, f) for f in range(n_floors)], ignore_index=True)
+    return df.iloc[:n_rows]
+
+
+def add_table_cells(doc, df):
+    # Cách cũ: ghi từng ô qua t.cell(i, j)
+    t = doc.add_table(df.shape[0]+1, df.shape[1])
+    t.style = 'Table Grid'
+    for j, col in enumerate(df.columns): t.cell(0, j).text = str(col)
+    for i, row in enumerate(df.itertuples(index=False)):
+        for j, val in enumerate(row): t.cell(i+1, j).text = str(val)
+
+
+def time_table(fn, df):
+    doc = Document()
+    t0 = time.perf_counter()
+    fn(doc, df)
+    doc.save(io.BytesIO())
+    return time.perf_counter() - t0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[50, 100, 200, 500, 1000, 2000, 4000, 8000, 16000])
+    ap.add_argument("--legacy-max", type=int, default=100, help="chỉ chạy cách cũ tới số dòng này (rất chậm)")
+    args = ap.parse_args(argv)
+    print(f"{'rows':>7} {'cell (s)':>10} {'us/row':>8} {'bulk (s)':>10} {'us/row':>8}")
+    for n in args.rows:
+        df = node_schedule(n)
+        legacy = time_table(add_table_cells, df) if n <= args.legacy_max else None
+        bulk = time_table(add_table_bulk, df)
+        leg = f"{legacy:10.3f} {legacy / n * 1e6:8.0f}" if legacy is not None else f"{'-':>10} {'-':>8}"
+        print(f"{n:7d} {leg} {bulk:10.3f} {bulk / n * 1e6:8.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# ==========================================
+# BENCHMARK KHỞI ĐỘNG LẠNH (COLD START) CỦA APP
+# ==========================================
+# Mỗi lần đo chạy trong một tiến trình Python mới (như container vừa khởi động, streamlit đã nạp sẵn),
+# chạy app một lần bằng AppTest:
+#   phần tử đầu : từ lúc bắt đầu chạy script đến khi phần tử giao diện đầu tiên được gửi đi
+#                 (gồm các lệnh import đầu app.py và set_page_config) - người dùng thấy trang từ lúc này
+#   lần chạy    : toàn bộ lần chạy script đầu tiên
+#   nạp         : thư viện nặng đã nạp lúc có phần tử đầu / sau lần chạy đầu
+# python benchmarks/startup.py                                      # app.py hiện tại
+# python benchmarks/startup.py --app /tmp/old/app.py --app app.py   # so sánh trước / sau
+HEAVY = ["plotly.graph_objs._figure", "xlsxwriter", "docx", "lxml.etree", "streamlit.emojis"]
+
+
+def _child(app):
+    app = Path(app).resolve()
+    sys.path.insert(0, str(app.parent))
+    import streamlit  # noqa: F401  (server đã nạp trước khi có phiên đầu tiên)
+    from streamlit.delta_generator import DeltaGenerator
+    from streamlit.testing.v1 import AppTest
+    first = {}
+    enqueue = DeltaGenerator._enqueue
+
+    def hooked(self, *args, **kw):
+        if not first: first.update(t=time.perf_counter(), heavy=[m for m in HEAVY if m in sys.modules])
+        return enqueue(self, *args, **kw)
+    DeltaGenerator._enqueue = hooked
+    at = AppTest.from_file(str(app), default_timeout=120)
+    t0 = time.perf_counter(); at.run(); t_run = time.perf_counter() - t0
+    return {"first_paint_s": first["t"] - t0, "first_run_s": t_run, "ok": not at.exception,
+            "heavy_at_paint": first["heavy"], "heavy_after_run": [m for m in HEAVY if m in sys.modules]}
+
+
+def measure(app, repeat):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, __file__, "--child", str(app)], capture_output=True, text=True, cwd=Path(app).resolve().parent)
+        if out.returncode: raise RuntimeError(out.stderr[-2000:])
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {"app": str(app), "repeat": repeat, "first_paint_s": statistics.median(r["first_paint_s"] for r in runs), "first_run_s": statistics.median(r["first_run_s"] for r in runs),
+            "ok": all(r["ok"] for r in runs), "heavy_at_paint": runs[-1]["heavy_at_paint"], "heavy_after_run": runs[-1]["heavy_after_run"]}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Đo thời gian khởi động lạnh của app (tiến trình mới mỗi lần đo, lấy trung vị).")
+    ap.add_argument("--app", action="append", default=None, help="đường dẫn app.py (lặp lại để so sánh nhiều phiên bản)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("-o", "--out", default=None, help="ghi kết quả JSON")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    if args.child:
+        print(json.dumps(_child(args.child)))
+        return 0
+
+    results = []
+    for app in args.app or [ROOT / "app.py"]:
+        r = measure(app, args.repeat); results.append(r)
+        print(f"{r['app']}\n  phần tử đầu  {r['first_paint_s'] * 1000:8.1f} ms\n  lần chạy đầu {r['first_run_s'] * 1000:8.1f} ms{'' if r['ok'] else '  (LỖI)'}\n"
+              f"  nạp lúc có phần tử đầu: {', '.join(r['heavy_at_paint']) or '-'}\n  nạp sau lần chạy đầu:   {', '.join(r['heavy_after_run']) or '-'}")
+    if len(results) > 1:
+        base = results[0]
+        for r in results[1:]:
+            print(f"\nSo với {base['app']}: phần tử đầu x{r['first_paint_s'] / base['first_paint_s']:.2f}, lần chạy đầu x{r['first_run_s'] / base['first_run_s']:.2f}")
+    if args.out: Path(args.out).write_text(json.dumps(results, indent=1, ensure_ascii=False), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
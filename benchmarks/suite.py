@@ -0,0 +1,141 @@
+import argparse
+import io
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import plotly  # noqa: E402
+
+from engine import DesignInput, run_design, column_takedown, takedown_table  # noqa: E402
+from drawings import grid_axes, plan_figure, elevation_figure  # noqa: E402
+from reports import to_excel, create_docx_report  # noqa: E402
+
+# ==========================================
+# BENCHMARK SUITE: ENGINE / HÌNH / XUẤT FILE
+# ==========================================
+# python benchmarks/suite.py                       # ma trận mặc định, ghi JSON vào benchmarks/results/
+# python benchmarks/suite.py --quick               # ma trận nhỏ
+# python benchmarks/suite.py --compare old.json    # so sánh với lần chạy trước, exit 1 nếu chậm hơn ngưỡng
+# Stage docx mở lại file Word và kiểm tra số bảng / số dòng trước khi đo (kiểm tra nhanh khi nâng python-docx).
+GRIDS = [3, 10, 25, 50]
+FLOORS = [1, 10, 50, 100]
+QUICK_GRIDS, QUICK_FLOORS = [3, 10], [1, 10]
+STAGES = ["engine", "takedown", "fig_plan", "fig_elev", "excel", "docx"]
+
+
+def synthetic_input(n_grid, n_floors):
+    spans = [6.0, 7.5] * n_grid
+    return DesignInput(spans[:n_grid - 1], spans[1:n_grid], [4.5] + [3.3] * (n_floors - 1), q_load=14.0, rb=17.0)
+
+
+def stage_runners(inp):
+    # Mỗi stage là một hàm không tham số trả về kích thước đầu ra (bytes) hoặc None
+    design = run_design(inp)
+    cum_x, lab_x, cum_y, lab_y = grid_axes(inp.lx_list, inp.ly_list)
+    b, h = design.col["b (mm)"].iat[0] / 1000, design.col["h (mm)"].iat[0] / 1000
+    tables = dict(design.tables(), Cot_Nut=takedown_table(design.takedown, 0))
+    mat_info = {"conc": "B30", "rb": inp.rb, "steel": "CB400-V", "rs": 350}
+    report = partial(create_docx_report, "Benchmark", "Văn phòng/Khách sạn", mat_info, inp.q_load, tables)
+    return {
+        "engine": lambda: run_design.__wrapped__(inp) and None,
+        "takedown": lambda: column_takedown(inp.lx_list, inp.ly_list, inp.num_floors, inp.q_load, inp.rb, inp.col_shape, inp.b_col_fixed, inp.k_safety) and None,
+        "fig_plan": lambda: len(plan_figure(cum_x, lab_x, cum_y, lab_y, b, h, "Dầm").to_json()),
+        "fig_elev": lambda: len(elevation_figure(cum_x, lab_x, inp.floors, b, 1).to_json()),
+        "excel": lambda: len(to_excel(tables)),
+        "docx": lambda: len(report()),
+        "docx_check": lambda: check_docx(report(), tables),
+    }
+
+
+def check_docx(data, tables):
+    # add_table_bulk dựa vào API nội bộ python-docx: mở lại file Word, mỗi bảng khác rỗng phải có đủ dòng (cả dòng tiêu đề)
+    from docx import Document
+    got = sorted(len(t.rows) for t in Document(io.BytesIO(data)).tables)
+    want = sorted(len(df) + 1 for df in tables.values() if not df.empty)
+    if got != want: raise RuntimeError(f"File Word sai số bảng / số dòng: {got} != {want}")
+
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter(); size = fn(); times.append(time.perf_counter() - t0)
+    # Bộ nhớ đo ở một lần chạy riêng: tracemalloc làm chậm nên không lẫn vào thời gian
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"time_s": min(times), "peak_mb": peak / 2**20, "size_bytes": size}
+
+
+def run_suite(grids, floors, stages, repeat=3, log=print):
+    results = []
+    for n_grid in grids:
+        for n_floors in floors:
+            runners = stage_runners(synthetic_input(n_grid, n_floors))
+            if "docx" in stages: runners["docx_check"]()  # một lần, ngoài phần đo
+            for stage in stages:
+                r = {"case": f"{n_grid}x{n_grid}/{n_floors}F", "grid": n_grid, "floors": n_floors, "stage": stage, **measure(runners[stage], repeat)}
+                results.append(r)
+                size = f"{r['size_bytes']:,} B" if r["size_bytes"] else "-"
+                log(f"{r['case']:>12} {stage:<9} {r['time_s'] * 1000:10.2f} ms {r['peak_mb']:9.2f} MB {size:>13}")
+    return results
+
+
+def metadata():
+    try: rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError: rev = ""
+    return {"git_rev": rev, "timestamp": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+            "platform": platform.platform(), "numpy": np.__version__, "pandas": pd.__version__, "plotly": plotly.__version__}
+
+
+def compare(results, baseline, threshold):
+    old = {(r["case"], r["stage"]): r for r in baseline["results"]}
+    worse = 0
+    print(f"\nSo với {baseline['meta'].get('git_rev') or '?'} ({baseline['meta'].get('timestamp')}), ngưỡng x{threshold}:")
+    for r in results:
+        o = old.get((r["case"], r["stage"]))
+        if not o or not o["time_s"]: continue
+        ratio = r["time_s"] / o["time_s"]
+        flag = "⛔" if ratio > threshold else ("✅" if ratio < 1 / threshold else "  ")
+        worse += ratio > threshold
+        print(f"{flag} {r['case']:>12} {r['stage']:<9} x{ratio:6.2f}  mem x{(r['peak_mb'] / o['peak_mb'] if o['peak_mb'] else 1):5.2f}")
+    return worse
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Đo thời gian / bộ nhớ / kích thước đầu ra của từng stage trên dự án giả lập.")
+    ap.add_argument("--grids", type=int, nargs="+", default=None, help=f"số trục mỗi phương (mặc định {GRIDS})")
+    ap.add_argument("--floors", type=int, nargs="+", default=None, help=f"số tầng (mặc định {FLOORS})")
+    ap.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    ap.add_argument("--quick", action="store_true", help=f"ma trận nhỏ {QUICK_GRIDS} x {QUICK_FLOORS}")
+    ap.add_argument("--repeat", type=int, default=3, help="số lần đo thời gian, lấy nhỏ nhất")
+    ap.add_argument("-o", "--out", default=None, help="file JSON kết quả (mặc định benchmarks/results/<thời gian>_<rev>.json)")
+    ap.add_argument("--compare", default=None, help="file JSON của lần chạy trước để so sánh")
+    ap.add_argument("--threshold", type=float, default=1.2, help="tỉ lệ thời gian coi là chậm đi (mặc định 1.2)")
+    args = ap.parse_args(argv)
+    grids = args.grids or (QUICK_GRIDS if args.quick else GRIDS)
+    floors = args.floors or (QUICK_FLOORS if args.quick else FLOORS)
+
+    meta = metadata()
+    results = run_suite(grids, floors, args.stages, args.repeat)
+    out = Path(args.out) if args.out else ROOT / "benchmarks" / "results" / f"{meta['timestamp'].replace(':', '')}_{meta['git_rev'] or 'local'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"meta": meta, "results": results}, indent=1, ensure_ascii=False), encoding="utf-8")
+    print(f"\nĐã ghi {out}")
+    if args.compare:
+        return 1 if compare(results, json.loads(Path(args.compare).read_text(encoding="utf-8")), args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
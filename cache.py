@@ -0,0 +1,97 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# BỘ NHỚ ĐỆM LRU & HASH NỘI DUNG
+# ==========================================
+class LRUCache:
+    """LRU cache có giới hạn số phần tử và (tuỳ chọn) tổng dung lượng bytes."""
+
+    def __init__(self, maxsize=32, max_bytes=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._data:
+                self._nbytes -= _sizeof(self._data.pop(key))
+            self._data[key] = value
+            self._nbytes += _sizeof(value)
+            while self._data and (len(self._data) > self.maxsize or (self.max_bytes is not None and self._nbytes > self.max_bytes and len(self._data) > 1)):
+                _, old = self._data.popitem(last=False)
+                self._nbytes -= _sizeof(old)
+
+    def get_or_create(self, key, factory):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._nbytes = 0
+
+
+_MISSING = object()
+
+
+def _sizeof(value):
+    return len(value) if isinstance(value, (bytes, bytearray)) else 0
+
+
+def content_hash(*objs):
+    """Hash ổn định theo nội dung (DataFrame, dict, list, số, chuỗi...)."""
+    h = hashlib.blake2b(digest_size=16)
+    for obj in objs: _feed(h, obj)
+    return h.hexdigest()
+
+
+def _feed(h, obj):
+    if isinstance(obj, pd.DataFrame):
+        h.update(b"DF")
+        h.update(repr((list(obj.columns), [str(t) for t in obj.dtypes], obj.shape)).encode())
+        if not obj.empty: h.update(pd.util.hash_pandas_object(obj, index=False).values.tobytes())
+    elif isinstance(obj, np.ndarray):
+        # repr() rút gọn mảng lớn bằng "..." nên phải băm theo bytes
+        h.update(b"A" + repr((str(obj.dtype), obj.shape)).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        h.update(b"D%d" % len(obj))
+        for k in sorted(obj, key=str):
+            _feed(h, k); _feed(h, obj[k])
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"L%d" % len(obj))
+        for item in obj: _feed(h, item)
+    else:
+        h.update(repr(obj).encode())
+    h.update(b"|")
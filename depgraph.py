@@ -0,0 +1,74 @@
+import time
+
+from cache import LRUCache, content_hash
+
+# ==========================================
+# ĐỒ THỊ PHỤ THUỘC - TÍNH LẠI TỪNG PHẦN
+# ==========================================
+# Mỗi nút là một hàm thuần của các đầu vào / nút phía trên. Chữ ký của đầu vào là hash nội dung,
+# chữ ký của nút là hash chữ ký các phụ thuộc: đổi một widget chỉ làm đổi chữ ký (và tính lại)
+# các nút phía dưới nó. Mỗi nút giữ vài kết quả gần nhất (LRU) nên đổi qua đổi lại không tính lại.
+# Nút cutoff=True (kết quả nhỏ) lấy chữ ký theo giá trị: tính lại ra cùng kết quả thì phía dưới không đổi.
+class DepGraph:
+    def __init__(self, keep=4):
+        self.keep = keep
+        self.funcs, self.deps, self.cache, self.cutoff = {}, {}, {}, set()
+        self.inputs = {}  # tên -> (chữ ký, giá trị)
+        self.log = []     # [(nút, tính lại?, giây)] từ lần begin() gần nhất
+        self.changed = [] # đầu vào đổi chữ ký từ lần begin() gần nhất
+        self._key, self._sig = {}, {}
+
+    def add(self, name, fn, deps, cutoff=False):
+        self.funcs[name], self.deps[name] = fn, list(deps)
+        if cutoff: self.cutoff.add(name)
+        if name not in self.cache: self.cache[name] = LRUCache(maxsize=self.keep)
+        return self
+
+    def set(self, **values):
+        for k, v in values.items():
+            sig = content_hash(v)
+            if self.inputs.get(k, (None,))[0] != sig:
+                self.inputs[k] = (sig, v); self._key.clear(); self._sig.clear(); self.changed.append(k)
+        return self
+
+    def begin(self):
+        self.log, self.changed = [], []
+        return self
+
+    def key(self, name):
+        # Khoá cache của nút = hash chữ ký các phụ thuộc
+        key = self._key.get(name)
+        if key is None: key = self._key[name] = content_hash(name, *(self.signature(d) for d in self.deps[name]))
+        return key
+
+    def signature(self, name):
+        if name in self.inputs: return self.inputs[name][0]
+        sig = self._sig.get(name)
+        if sig is None:
+            sig = self._sig[name] = content_hash(self.get(name)) if name in self.cutoff else self.key(name)
+        return sig
+
+    def get(self, name):
+        if name in self.inputs: return self.inputs[name][1]
+        sig, cache = self.key(name), self.cache[name]
+        value = cache.get(sig, _MISSING)
+        if value is not _MISSING:
+            self.log.append((name, False, 0.0))
+            return value
+        args = [self.get(d) for d in self.deps[name]]
+        t0 = time.perf_counter(); value = self.funcs[name](*args)
+        self.log.append((name, True, time.perf_counter() - t0))
+        cache.put(sig, value)
+        return value
+
+    def downstream(self, inputs):
+        # Các nút bị ảnh hưởng khi các đầu vào này đổi
+        hit = set(inputs); changed = True
+        while changed:
+            changed = False
+            for n, deps in self.deps.items():
+                if n not in hit and hit.intersection(deps): hit.add(n); changed = True
+        return [n for n in self.deps if n in hit]
+
+
+_MISSING = object()
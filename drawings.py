@@ -0,0 +1,154 @@
+import math
+
+import numpy as np
+
+from elements import axis_labels
+from engine import level_z, level_label, segment_breaks
+
+# ==========================================
+# BẢN VẼ (PLAN / ELEVATION) - TRACE GỘP
+# ==========================================
+# Mỗi nhóm đối tượng (lưới, bubble, dầm, cột...) là MỘT trace; các đoạn/đa giác
+# ngăn cách bằng NaN (plotly hiểu là gap) nên số trace không tăng theo kích thước lưới.
+COORD = np.float32  # plotly gửi mảng numpy dạng nhị phân: float32 giảm nửa payload, đủ chính xác cho bản vẽ
+GRID_LINE = dict(color='#BDC3C7', width=1, dash='dash')
+BUBBLE = dict(size=25, color='white', line=dict(color='black', width=1))
+
+
+def grid_axes(lx_list, ly_list):
+    cum_x = np.concatenate([[0.0], np.cumsum(lx_list)])
+    cum_y = np.concatenate([[0.0], np.cumsum(ly_list)])
+    labels_x = [str(i + 1) for i in range(len(cum_x))]
+    labels_y = axis_labels(len(cum_y))
+    return cum_x, labels_x, cum_y, labels_y
+
+
+def segments(x0, y0, x1, y1):
+    # n đoạn thẳng -> 1 polyline: x0,x1,NaN,...
+    x0, y0, x1, y1 = (a.ravel() for a in np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (x0, y0, x1, y1))))
+    nan = np.full(x0.shape, np.nan)
+    return np.column_stack([x0, x1, nan]).ravel().astype(COORD), np.column_stack([y0, y1, nan]).ravel().astype(COORD)
+
+
+def rects(x0, y0, x1, y1):
+    # n hình chữ nhật -> 1 đa giác kín (fill='toself'), mỗi hình 5 đỉnh + NaN
+    x0, y0, x1, y1 = (a.ravel() for a in np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (x0, y0, x1, y1))))
+    nan = np.full(x0.shape, np.nan)
+    return np.column_stack([x0, x1, x1, x0, x0, nan]).ravel().astype(COORD), np.column_stack([y0, y0, y1, y1, y0, nan]).ravel().astype(COORD)
+
+
+def plan_figure(cum_x, labels_x, cum_y, labels_y, bc_m, hc_m, beam_label):
+    cum_x, cum_y = np.asarray(cum_x, dtype=float), np.asarray(cum_y, dtype=float)
+    x_lo, x_hi, y_lo, y_hi = cum_x.min(), cum_x.max(), cum_y.min(), cum_y.max()
+    nx, ny = len(cum_x), len(cum_y)
+    import plotly.graph_objects as go  # nạp khi vẽ lần đầu, không phải lúc import module
+    fig = go.Figure()
+    # Lưới trục
+    gx, gy = segments(np.concatenate([cum_x, np.full(ny, x_lo - 1)]), np.concatenate([np.full(nx, y_lo - 1), cum_y]),
+                      np.concatenate([cum_x, np.full(ny, x_hi + 1)]), np.concatenate([np.full(nx, y_hi + 1), cum_y]))
+    fig.add_trace(go.Scattergl(x=gx, y=gy, mode='lines', line=GRID_LINE, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=np.concatenate([cum_x, np.full(ny, x_hi + 1)]), y=np.concatenate([np.full(nx, y_hi + 1), cum_y]), mode='text',
+                             text=list(labels_x) + list(labels_y), textposition=["top center"] * nx + ["middle right"] * ny, hoverinfo='skip'))
+    # Bubble trục
+    fig.add_trace(go.Scatter(x=np.concatenate([cum_x, np.full(ny, x_lo - 1)]), y=np.concatenate([np.full(nx, y_lo - 1), cum_y]), mode='markers+text',
+                             marker=BUBBLE, text=list(labels_x) + list(labels_y), textposition="middle center", hoverinfo='skip'))
+    # Dầm
+    bx, by = segments(np.concatenate([np.full(ny, x_lo), cum_x]), np.concatenate([cum_y, np.full(nx, y_lo)]),
+                      np.concatenate([np.full(ny, x_hi), cum_x]), np.concatenate([cum_y, np.full(nx, y_hi)]))
+    fig.add_trace(go.Scattergl(x=bx, y=by, mode='lines', line=dict(color='#2980B9', width=3), name='Dầm', hoverinfo='text', hovertext=beam_label))
+    # Cột tại mọi giao điểm
+    X, Y = np.meshgrid(cum_x, cum_y)
+    cx, cy = rects(X - bc_m / 2, Y - hc_m / 2, X + bc_m / 2, Y + hc_m / 2)
+    fig.add_trace(go.Scatter(x=cx, y=cy, mode='lines', fill='toself', fillcolor="#E74C3C", line=dict(width=0), name='Cột', hoverinfo='skip'))
+    fig.update_layout(xaxis=dict(visible=False, fixedrange=False, range=[x_lo-2, x_hi+2]), yaxis=dict(visible=False, scaleanchor="x", fixedrange=False, range=[y_lo-2, y_hi+2]), margin=dict(l=10,r=10,t=10,b=10), height=500, dragmode="pan", showlegend=False)
+    return fig
+
+
+# --- MẶT ĐỨNG: GỘP TRACE + LEVEL-OF-DETAIL ---
+ELEV_MAX_LEVELS = 40  # số cao độ tối đa vẽ chi tiết, payload không tăng theo số tầng
+DETAIL_WINDOW = 2     # số cao độ chi tiết hai bên tầng đang xem
+ACTIVE_COLOR, LEVEL_COLOR = '#E74C3C', '#7F8C8D'
+BEAM_FILL, COL_FILL, BAND_FILL = 'rgba(52,152,219,0.5)', 'rgba(189,195,199,0.5)', 'rgba(52,152,219,0.15)'
+
+
+def lod_levels(floors, budget=ELEV_MAX_LEVELS):
+    """Chỉ số (tăng dần) các cao độ 0..n được vẽ; tầng điển hình còn lại gộp thành dải.
+
+    Tính trên các đoạn (chiều cao, số tầng) nên chi phí không phụ thuộc số tầng.
+    """
+    n = sum(c for _, c in floors)
+    if n + 1 <= budget: return np.arange(n + 1)
+    half = max(budget // 2, 1)
+    shown = [np.arange(0, n + 1, math.ceil(n / half)), [0, n]]
+    # Giữ cao độ chuyển tiếp giữa các đoạn chiều cao khác nhau (nếu không quá nhiều)
+    breaks = segment_breaks(floors)
+    if len(breaks) <= half: shown.append(breaks)
+    return np.unique(np.concatenate(shown).astype(np.int64))
+
+
+def _level_label(label, z, active=False):
+    return f"<b>{label} (+{z:.2f})</b>" if active else f"{label} (+{z:.2f})"
+
+
+def elevation_figure(cum_x, labels_x, floors, bc_m, active_level):
+    cum_x = np.asarray(cum_x, dtype=float)
+    shown = lod_levels(floors)
+    x_min, x_max = cum_x.min() - 1, cum_x.max() + 1
+    zs = level_z(floors, shown)
+    marker_x, z_top = x_max + 1.5, zs.max()
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    # Trục đứng + bubble
+    gx, gy = segments(cum_x, -1, cum_x, z_top + 1)
+    fig.add_trace(go.Scattergl(x=gx, y=gy, mode='lines', line=GRID_LINE, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=cum_x, y=np.full(len(cum_x), -1.5), mode='markers+text', marker=BUBBLE, text=list(labels_x), textposition="middle center"))
+    # Cao độ (đường, mốc, nhãn)
+    lx, ly = segments(x_min, zs, marker_x, zs)
+    fig.add_trace(go.Scattergl(x=lx, y=ly, mode='lines', line=dict(color=LEVEL_COLOR, width=1, dash='dot'), hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=np.full(len(zs), marker_x), y=zs, mode='markers+text', marker=dict(symbol='triangle-down', size=15, color=LEVEL_COLOR, line=dict(width=1, color=LEVEL_COLOR)), textposition="top center", textfont=dict(color=LEVEL_COLOR, size=12), hoverinfo='skip', name='level_marks'))
+    # Cột (1 dải / trục) & dầm (1 dải / cao độ, gộp các nhịp liền nhau)
+    cx, cy = rects(cum_x - bc_m / 2, 0, cum_x + bc_m / 2, z_top)
+    fig.add_trace(go.Scatter(x=cx, y=cy, mode='lines', fill='toself', fillcolor=COL_FILL, line=dict(width=0), hoverinfo='skip'))
+    bz = zs[1:]
+    bx, by = rects(cum_x.min(), bz - 0.5, cum_x.max(), bz)
+    fig.add_trace(go.Scatter(x=bx, y=by, mode='lines', fill='toself', fillcolor=BEAM_FILL, line=dict(width=0), hoverinfo='skip'))
+    # Dải tầng điển hình bị gộp
+    gap = np.diff(shown) - 1; sel = gap > 0
+    z0, z1 = zs[:-1][sel], zs[1:][sel]
+    wx, wy = rects(cum_x.min(), z0, cum_x.max(), z1 - 0.5)
+    fig.add_trace(go.Scatter(x=wx, y=wy, mode='lines', fill='toself', fillcolor=BAND_FILL, line=dict(width=0), hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=np.full(len(z0), (cum_x.min() + cum_x.max()) / 2), y=(z0 + z1) / 2, mode='text', text=[f"⋮ {k} tầng" for k in gap[sel]], textfont=dict(color=LEVEL_COLOR, size=11), hoverinfo='skip'))
+    # Lớp chi tiết quanh tầng đang xem (được vá lại khi chuyển tầng)
+    fig.add_trace(go.Scattergl(x=[], y=[], mode='lines', line=dict(color=LEVEL_COLOR, width=1, dash='dot'), hoverinfo='skip', name='detail_lines'))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', fill='toself', fillcolor=BEAM_FILL, line=dict(width=0), hoverinfo='skip', name='detail_beams'))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='markers+text', marker=dict(symbol='triangle-down', size=15, color=LEVEL_COLOR), textposition="top center", textfont=dict(color=LEVEL_COLOR, size=12), hoverinfo='skip', name='detail_marks'))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', line=dict(color=ACTIVE_COLOR, width=3, dash='solid'), hoverinfo='skip', name='active_line'))
+    fig.add_trace(go.Scatter(x=[], y=[], mode='markers+text', marker=dict(symbol='triangle-down', size=15, color=ACTIVE_COLOR, line=dict(width=1, color=ACTIVE_COLOR)), textposition="top center", textfont=dict(color=ACTIVE_COLOR, size=14), hoverinfo='skip', name='active_mark'))
+    fig.update_layout(xaxis=dict(visible=False, fixedrange=False, range=[x_min-1, x_max+4]), yaxis=dict(visible=False, scaleanchor="x", fixedrange=False, range=[-2, z_top+2]), margin=dict(l=10,r=10,t=10,b=10), height=500, dragmode="pan", showlegend=False)
+    highlight_level(fig, cum_x, floors, shown, active_level)
+    return fig
+
+
+def highlight_level(fig, cum_x, floors, shown, active_level):
+    """Vá lớp chi tiết + cao độ đang xem, không dựng lại hình."""
+    cum_x = np.asarray(cum_x, dtype=float)
+    n = sum(c for _, c in floors)
+    x_min, x_max = cum_x.min() - 1, cum_x.max() + 1
+    marker_x = x_max + 1.5
+    # Nhãn nền: bỏ nhãn của tầng đang xem để không chồng chữ
+    fig.update_traces(selector=dict(name='level_marks'), text=[_level_label(level_label(i, n), z) if i != active_level else "" for i, z in zip(shown, level_z(floors, shown))])
+    lo, hi = max(active_level - DETAIL_WINDOW, 0), min(active_level + DETAIL_WINDOW, n)
+    win = np.arange(lo, hi + 1)
+    win = win[~np.isin(win, shown)]
+    bz = level_z(floors, win[win > 0])
+    bx, by = rects(cum_x.min(), bz - 0.5, cum_x.max(), bz)
+    fig.update_traces(selector=dict(name='detail_beams'), x=bx, y=by)
+    win = win[win != active_level]
+    dz = level_z(floors, win)
+    lx, ly = segments(x_min, dz, marker_x, dz)
+    fig.update_traces(selector=dict(name='detail_lines'), x=lx, y=ly)
+    fig.update_traces(selector=dict(name='detail_marks'), x=np.full(len(dz), marker_x), y=dz, text=[_level_label(level_label(i, n), z) for i, z in zip(win, dz)])
+    z = float(level_z(floors, [active_level])[0])
+    fig.update_traces(selector=dict(name='active_line'), x=[x_min, marker_x], y=[z, z])
+    fig.update_traces(selector=dict(name='active_mark'), x=[marker_x], y=[z], text=[_level_label(level_label(active_level, n), z, active=True)])
+    return fig
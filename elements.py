@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# KHO CẤU KIỆN DẠNG CỘT (TYPED COLUMNAR STORE)
+# ==========================================
+# Engine trả về bảng kiểu số: b/h int32 (mm; int16 tràn với cột nhà cao tầng lưới lớn), tải float32, trạng thái / loại nút categorical,
+# chỉ số tầng / trục nguyên. Chuỗi ("220x600", "Tầng 1-3", "1-A") chỉ được ghép ở
+# display_table() - lúc hiển thị hoặc xuất file.
+OK = "✅ ĐẠT"
+FAIL = "⛔ KHÔNG ĐẠT"
+STATUS = pd.CategoricalDtype([OK, FAIL])
+NODE_KIND = pd.CategoricalDtype(["Giữa", "Biên", "Góc"])
+MM, LOAD = np.int32, np.float32
+
+
+def status(ok):
+    return pd.Categorical.from_codes(np.where(np.asarray(ok), 0, 1).astype(np.int8), dtype=STATUS)
+
+
+def frame(columns):
+    # Không sao chép mảng: bảng là view trên dữ liệu engine
+    return pd.DataFrame(columns, copy=False)
+
+
+def _section(b, h):
+    return b.astype(str) + "x" + h.astype(str)
+
+
+def _dims(b, l):
+    return b.map("{:.2f}".format) + "x" + l.map("{:.2f}".format)
+
+
+def _floor_range(lo, hi):
+    return "Tầng " + lo.astype(str) + "-" + hi.astype(str)
+
+
+def axis_label(j):
+    # Trục chữ kiểu cột bảng tính (0 -> A, 25 -> Z, 26 -> AA, ...): lưới > 26 trục không ra "[", "\\"...
+    s = ""
+    j += 1
+    while j:
+        j, r = divmod(j - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+def axis_labels(n):
+    return [axis_label(j) for j in range(n)]
+
+
+def _node(ix, iy):
+    letters = np.array(axis_labels(int(iy.max()) if len(iy) else 0), dtype=object)
+    return ix.astype(str) + "-" + pd.Series(letters[iy.to_numpy(dtype=np.int64) - 1], index=iy.index)
+
+
+# cột đầu của cặp -> (tên cột hiển thị, cột thứ hai, hàm ghép)
+PAIRED = {
+    "b (mm)": ("Tiết diện", "h (mm)", _section),
+    "b CHỌN (mm)": ("Tiết diện CHỌN (mm)", "h CHỌN (mm)", _section),
+    "Tầng từ": ("Vị trí", "Tầng đến", _floor_range),
+    "Trục X": ("Nút", "Trục Y", _node),
+    "Cọc theo X": ("Bố trí cọc", "Cọc theo Y", _section),
+    "Đài B (m)": ("Kích thước đài (m)", "Đài L (m)", _dims),
+}
+_SECOND = {v[1] for v in PAIRED.values()}
+
+
+def display_table(df):
+    """Bảng để hiển thị / xuất: ghép các cặp cột số thành chuỗi, categorical -> chuỗi."""
+    out = {}
+    for c in df.columns:
+        s = df[c]
+        if c in PAIRED:
+            label, other, fmt = PAIRED[c]
+            out[label] = fmt(s, df[other])
+        elif c in _SECOND:
+            continue
+        elif isinstance(s.dtype, pd.CategoricalDtype):
+            out[c] = s.astype(str)
+        else:
+            out[c] = s
+    return pd.DataFrame(out, index=df.index, copy=False)
@@ -0,0 +1,334 @@
+import math
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from depgraph import DepGraph
+from elements import NODE_KIND, MM, LOAD, status, frame
+
+# ==========================================
+# ENGINE TÍNH TOÁN SƠ BỘ (KHÔNG PHỤ THUỘC UI)
+# ==========================================
+# Data chuẩn
+RB_MAP = {"B15": 8.5, "B20": 11.5, "B25": 14.5, "B30": 17.0, "B35": 19.5, "B40": 22.0, "B45": 25.0, "B50": 27.5}
+RS_MAP = {"CB240-T": 210, "CB300-T": 260, "CB300-V": 260, "CB400-V": 350, "CB500-V": 435, "CB600-V": 520}
+Q_DEFAULTS = {"Nhà phố/Biệt thự": 10.0, "Văn phòng/Khách sạn": 14.0, "Chung cư cao tầng": 14.5}
+PILE_STD = ["Vuông 200x200", "Vuông 250x250", "Vuông 300x300", "Vuông 350x350", "Vuông 400x400", "Ly tâm D300", "Ly tâm D350", "Ly tâm D400", "Ly tâm D500", "Ly tâm D600", "Khoan nhồi D800", "Khoan nhồi D1000"]
+# Sức chịu tải thiết kế tham khảo theo loại cọc (Tấn) - dùng khi quét phương án
+PILE_CAPACITY = {"Vuông 200x200": 20, "Vuông 250x250": 30, "Vuông 300x300": 45, "Vuông 350x350": 60, "Vuông 400x400": 80, "Ly tâm D300": 40, "Ly tâm D350": 55, "Ly tâm D400": 70, "Ly tâm D500": 110, "Ly tâm D600": 150, "Khoan nhồi D800": 250, "Khoan nhồi D1000": 400}
+B_COL_RANGE = (150, 1000)   # cạnh b cột cho phép (mm), như ô nhập ở sidebar
+FOUND_PILE = "Móng Cọc (Pile)"
+FOUND_SHALLOW = "Móng Đơn/Băng"
+
+
+# --- CHUỖI NHẬP DẠNG ĐOẠN LẶP (GIÁ TRỊ, SỐ LẦN) ---
+def parse_segments(input_str):
+    """'4.5, 3.3x9' -> [(4.5, 1), (3.3, 9)]; các đoạn liền nhau cùng giá trị được gộp.
+
+    Phần tử sai cú pháp -> ValueError liệt kê đủ các phần tử lỗi.
+    """
+    segs, bad = [], []
+    for item in str(input_str).split(','):
+        item = item.strip().lower()
+        if not item: continue
+        try:
+            if 'x' in item:
+                val, count = item.split('x'); val, count = float(val), int(count)
+            else:
+                val, count = float(item), 1
+            if count < 1 or not math.isfinite(val): raise ValueError
+        except ValueError:
+            bad.append(item); continue
+        if segs and segs[-1][0] == val: segs[-1] = (val, segs[-1][1] + count)
+        else: segs.append((val, count))
+    if bad: raise ValueError("Không đọc được: " + ", ".join(f"'{b}'" for b in bad))
+    return segs
+
+
+def as_segments(values):
+    # Nhận list giá trị phẳng hoặc list (giá trị, số lần); trả tuple đoạn đã gộp
+    values = list(values)
+    if values and isinstance(values[0], (tuple, list)):
+        v = np.array([float(a) for a, _ in values]); c = np.array([int(b) for _, b in values], dtype=np.int64)
+    else:
+        v = np.asarray(values, dtype=float); c = np.ones(len(v), dtype=np.int64)
+    v, c = v[c > 0], c[c > 0]
+    if not len(v): return ()
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(v) != 0) + 1])
+    return tuple((float(v[i]), int(n)) for i, n in zip(starts, np.add.reduceat(c, starts)))
+
+
+def expand_segments(segs):
+    return np.repeat([v for v, _ in segs], [n for _, n in segs]).astype(float)
+
+
+def parse_input_string(input_str):
+    return expand_segments(parse_segments(input_str)).tolist()
+
+
+def segment_breaks(segs):
+    # Chỉ số cao độ nơi chiều cao tầng đổi (ranh giới giữa các đoạn)
+    return np.cumsum([n for _, n in segs])[:-1]
+
+
+def level_z(segs, levels):
+    """Cao độ (m) của các mức 0..n tính kín trên từng đoạn: không cần trải ra từng tầng."""
+    v = np.array([v for v, _ in segs], dtype=float); c = np.array([n for _, n in segs], dtype=np.int64)
+    start = np.concatenate([[0], np.cumsum(c)])
+    z0 = np.concatenate([[0.0], np.cumsum(v * c)])
+    lv = np.asarray(levels, dtype=np.int64)
+    k = np.clip(np.searchsorted(start, lv, side="right") - 1, 0, len(v) - 1)
+    return z0[k] + (lv - start[k]) * v[k]
+
+
+def level_label(i, n):
+    return "Móng" if i == 0 else ("Mái" if i == n else f"Tầng {i}")
+
+
+def pile_diameter(pile_sel):
+    if "Vuông" in pile_sel: return int(pile_sel.split(' ')[1].split('x')[0])
+    if "D" in pile_sel: return int(pile_sel.split('D')[1])
+    return 400
+
+
+@dataclass(frozen=True)
+class DesignInput:
+    lx_list: tuple
+    ly_list: tuple
+    floors: tuple  # đoạn (chiều cao tầng, số tầng) từ dưới lên; nhận cả list cao độ phẳng
+    q_load: float = 14.0
+    rb: float = 14.5
+    col_shape: str = "Chữ nhật"
+    b_col_fixed: float = 220
+    k_safety: float = 1.15
+    has_shearwall: bool = False
+    found_type: str = FOUND_PILE
+    pile_type: str = "Vuông 300x300"
+    d_pile: float = 300
+    p_pile: float = 45
+    r_dat: float = 1.5
+
+    def __post_init__(self):
+        # Cho phép truyền list, lưu tuple để hash được (làm khoá memo)
+        for name in ("lx_list", "ly_list"):
+            object.__setattr__(self, name, tuple(float(v) for v in getattr(self, name)))
+        object.__setattr__(self, "floors", as_segments(self.floors))
+
+    @property
+    def num_floors(self):
+        return sum(n for _, n in self.floors)
+
+
+@dataclass
+class DesignResult:
+    slab: pd.DataFrame
+    beam: pd.DataFrame
+    col: pd.DataFrame
+    wall: pd.DataFrame
+    found: pd.DataFrame
+    info: dict = field(default_factory=dict)
+    takedown: "ColumnTakedown" = None
+
+    def tables(self, pile_layout=None):
+        # Thứ tự & tên sheet giống file Excel / thuyết minh; app và batch xuất cùng bộ bảng
+        data = {"San": self.slab, "Dam": self.beam, "Cot": self.col, "Mong": self.found}
+        if not self.wall.empty: data["Vach"] = self.wall
+        if pile_layout is not None: data["Mong_Nut"] = pile_layout
+        return data
+
+
+# --- CÁC HÀM TÍNH TỪNG CẤU KIỆN ---
+def span_limits(lx_list, ly_list):
+    l_max = max(max(lx_list, default=0), max(ly_list, default=0))
+    l_min = min(max(lx_list, default=0), max(ly_list, default=0))
+    area_trib = max(lx_list, default=0) * max(ly_list, default=0)
+    return l_max, l_min, area_trib
+
+
+def design_slab(l_min, q_load):
+    hs_calc = (l_min * 1000) / 35
+    hs_select = max(100, math.ceil(hs_calc / 10) * 10)
+    df = pd.DataFrame([{"Cấu kiện": "Sàn điển hình", "Hoạt tải (kN/m2)": q_load, "Nhịp ngắn L (m)": l_min, "Công thức": "L/35", "Chiều dày YC (mm)": hs_calc, "Chiều dày CHỌN (mm)": int(hs_select), "Hệ số AT": hs_select/hs_calc if hs_calc else 0}])
+    df["Trạng thái"] = status([hs_select >= hs_calc])
+    return df, {"hs_calc": hs_calc, "hs_select": hs_select}
+
+
+def design_beam(l_max):
+    hd_calc = (l_max * 1000) / 12; hd_select = math.ceil(hd_calc / 50) * 50
+    bd_calc = 0.4 * hd_select; bd_select = max(200, math.ceil(bd_calc / 50) * 50)
+    if hd_select >= 700 and bd_select < 300: bd_select = 300
+    hd_sec = (l_max * 1000) / 16; hd_sec_s = math.ceil(hd_sec / 50) * 50
+    bd_sec_s = max(200, math.ceil(0.4 * hd_sec_s / 50) * 50)
+    df = pd.DataFrame([
+        {"Cấu kiện": "Dầm khung chính", "Nhịp lớn L (m)": l_max, "Công thức": "L/12", "Chiều cao YC (mm)": hd_calc, "b CHỌN (mm)": bd_select, "h CHỌN (mm)": hd_select, "Hệ số AT": hd_select/hd_calc if hd_calc else 0},
+        {"Cấu kiện": "Dầm phụ", "Nhịp lớn L (m)": l_max, "Công thức": "L/16", "Chiều cao YC (mm)": hd_sec, "b CHỌN (mm)": bd_sec_s, "h CHỌN (mm)": hd_sec_s, "Hệ số AT": hd_sec_s/hd_sec if hd_sec else 0}
+    ]).astype({"b CHỌN (mm)": MM, "h CHỌN (mm)": MM})
+    df["Trạng thái"] = status([True, True])
+    return df, {"hd_calc": hd_calc, "hd_select": hd_select, "bd_select": bd_select}
+
+
+def design_columns(num_floors, q_load, area_trib, rb, col_shape, b_col_fixed, k_safety):
+    # Nhóm 3 tầng một tiết diện: tính kín theo nhóm, không duyệt từng tầng
+    if num_floors < 1: return pd.DataFrame(), {"N_groups": np.zeros(0)}
+    lo = np.arange(1, num_floors + 1, 3); hi = np.minimum(lo + 2, num_floors)
+    N_calc = k_safety * q_load * area_trib * (num_floors - lo + 1).astype(float)
+    Ac_req = (N_calc * 1000) / rb
+    if col_shape == "Vuông":
+        b_sel = h_sel = np.ceil(np.sqrt(Ac_req) / 50) * 50
+    else:
+        h_sel = np.ceil(Ac_req / b_col_fixed / 50) * 50; b_sel = np.full(len(lo), float(b_col_fixed))
+    b_sel, h_sel = np.maximum(b_sel, 200).astype(MM), np.maximum(h_sel, 200).astype(MM)
+    A_sel = b_sel.astype(np.int64) * h_sel  # xét đạt trên đúng giá trị được lưu
+    df = frame({
+        "Tầng từ": lo.astype(MM), "Tầng đến": hi.astype(MM),
+        "Tải N (kN)": N_calc.astype(LOAD),
+        "A_yc (cm2)": (Ac_req / 100).astype(LOAD),
+        "b (mm)": b_sel, "h (mm)": h_sel,
+        "A_chon (cm2)": (A_sel / 100).astype(np.int32),
+        "Ratio": np.divide(A_sel, Ac_req, out=np.zeros(len(lo)), where=Ac_req != 0).astype(LOAD),
+        "Trạng thái": status(A_sel >= Ac_req),
+    })
+    # Tải float64 giữ lại cho móng (bảng chỉ lưu float32)
+    return df, {"N_groups": N_calc}
+
+
+# --- DỒN TẢI CỘT THEO TỪNG NÚT x TỪNG TẦNG (VECTOR HOÁ) ---
+
+
+def tributary_widths(spans):
+    # Bề rộng truyền tải của mỗi trục = nửa nhịp hai bên
+    s = np.asarray(spans, dtype=float)
+    w = np.zeros(len(s) + 1)
+    w[:-1] += s / 2; w[1:] += s / 2
+    return w
+
+
+@dataclass
+class ColumnTakedown:
+    area: np.ndarray   # (n_nodes,) diện tích truyền tải (m2), nút đánh số theo hàng Y rồi cột X
+    kind: np.ndarray   # (n_nodes,) int8: 0 giữa / 1 biên / 2 góc
+    N: np.ndarray      # (n_floors, n_nodes) float32 lực dọc (kN), hàng 0 = tầng 1
+    b: np.ndarray      # (n_floors, n_nodes) int32 cạnh b chọn (mm)
+    h: np.ndarray      # (n_floors, n_nodes) int32 cạnh h chọn (mm)
+    ok: np.ndarray     # (n_floors, n_nodes) bool, xét trên b/h đã lưu
+    nx: int
+    ny: int
+    rb: float
+
+    @property
+    def A_req(self):
+        # Diện tích yêu cầu (mm2) suy ra từ N, không lưu
+        return self.N * LOAD(1000 / self.rb)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.area, self.kind, self.N, self.b, self.h, self.ok))
+
+
+def select_sections(A_req, col_shape, b_col_fixed):
+    if col_shape == "Vuông":
+        b = h = np.ceil(np.sqrt(A_req) / 50) * 50
+    else:
+        h = np.ceil(A_req / b_col_fixed / 50) * 50; b = np.broadcast_to(b_col_fixed, h.shape)
+    return np.maximum(b, 200).astype(np.int32), np.maximum(h, 200).astype(np.int32)
+
+
+def column_takedown(lx_list, ly_list, num_floors, q_load, rb, col_shape, b_col_fixed, k_safety):
+    wx, wy = tributary_widths(lx_list), tributary_widths(ly_list)
+    area = np.outer(wy, wx).ravel()
+    edge_x = np.zeros(len(wx), dtype=np.int8); edge_x[[0, -1]] = 1
+    edge_y = np.zeros(len(wy), dtype=np.int8); edge_y[[0, -1]] = 1
+    kind = np.add.outer(edge_y, edge_x).ravel()
+    # Cột tầng f đỡ các sàn từ f đến mái
+    n_supported = np.arange(num_floors, 0, -1, dtype=float)
+    N = k_safety * q_load * np.outer(n_supported, area)
+    A_req = N * 1000 / rb
+    b, h = select_sections(A_req, col_shape, b_col_fixed)
+    b, h = b.astype(MM), h.astype(MM)
+    return ColumnTakedown(area, kind, N.astype(LOAD), b, h, b.astype(np.int64) * h >= A_req, len(wx), len(wy), rb)
+
+
+def takedown_table(td, floor_idx):
+    # View một tầng: N, b, h không sao chép; chuỗi nút / tiết diện ghép ở display_table
+    b, h, A_req = td.b[floor_idx], td.h[floor_idx], td.A_req[floor_idx]
+    A_sel = b.astype(np.int64) * h
+    return frame({
+        "Trục X": np.tile(np.arange(1, td.nx + 1, dtype=MM), td.ny),
+        "Trục Y": np.repeat(np.arange(1, td.ny + 1, dtype=MM), td.nx),
+        "Loại": pd.Categorical.from_codes(td.kind, dtype=NODE_KIND),
+        "Diện tích TT (m2)": td.area,
+        "Tải N (kN)": td.N[floor_idx],
+        "A_yc (cm2)": A_req / 100,
+        "b (mm)": b, "h (mm)": h,
+        "A_chon (cm2)": A_sel // 100,
+        "Ratio": np.divide(A_sel, A_req, out=np.zeros(len(A_req), dtype=LOAD), where=A_req > 0),
+        "Trạng thái": status(td.ok[floor_idx]),
+    })
+
+
+def design_wall(floor_heights):
+    floor_heights = list(floor_heights)
+    h_max = max(floor_heights) if floor_heights else 3.3
+    tw_calc = h_max * 1000 / 20; tw_select = max(200, math.ceil(tw_calc / 50) * 50)
+    df = pd.DataFrame([{"Cấu kiện": "Vách cứng điển hình", "Chiều cao tầng H (m)": h_max, "Công thức": "H/20", "Chiều dày YC (mm)": tw_calc, "Chiều dày CHỌN (mm)": int(tw_select), "Hệ số AT": tw_select/tw_calc if tw_calc else 0}])
+    df["Trạng thái"] = status([True])
+    return df
+
+
+def design_foundation(N_footing, found_type, pile_type, d_pile, p_pile, r_dat):
+    if found_type == FOUND_PILE:
+        n_pile_calc = N_footing / (p_pile * 9.81); n_pile = math.ceil(n_pile_calc * 1.2)
+        spacing = 3 * (d_pile/1000); edge = 0.7 * (d_pile/1000)
+        w = l = round(math.sqrt(n_pile * spacing**2), 1) if n_pile > 4 else round(spacing + d_pile/1000 + 2*edge, 2)
+        mong_desc = f"{n_pile} cọc {pile_type}"; mong_detail = f"Đài {w}x{l}m (P={p_pile}T)"
+        df = pd.DataFrame([{"Cấu kiện": f"Móng ({found_type})", "Tải chân cột N (kN)": N_footing, "Sức chịu tải P (T)": p_pile, "Số cọc YC": n_pile_calc, "Số cọc CHỌN": int(n_pile), "Kích thước / Ghi chú": mong_detail}])
+    else:
+        R_convert = r_dat * 100; F_req = N_footing / (R_convert - 20); side = math.ceil(math.sqrt(F_req)*10)/10
+        mong_desc = f"Móng đơn B={side}m"; mong_detail = f"R={r_dat}kg/cm2"
+        df = pd.DataFrame([{"Cấu kiện": f"Móng ({found_type})", "Tải chân cột N (kN)": N_footing, "R đất (kg/cm2)": r_dat, "Diện tích YC (m2)": F_req, "Diện tích CHỌN (m2)": side*side, "Kích thước / Ghi chú": mong_detail}])
+    df["Trạng thái"] = status([True])
+    return df, {"N_footing": N_footing, "mong_desc": mong_desc, "mong_detail": mong_detail}
+
+
+# --- ĐỒ THỊ PHỤ THUỘC: lưới -> nhịp -> sàn/dầm, cao độ -> vách, tải + vật liệu -> cột -> móng ---
+def _foundation(columns, found_type, pile_type, d_pile, p_pile, r_dat):
+    N_groups = columns[1]["N_groups"]  # nhóm 0 = tầng 1-3: tải chân cột lớn nhất
+    return design_foundation(N_groups[0] * 1.1 if len(N_groups) else 0, found_type, pile_type, d_pile, p_pile, r_dat)
+
+
+def _assemble(spans, slab, beam, columns, wall, foundation, takedown):
+    l_max, l_min, area_trib = spans
+    info = {"l_max": l_max, "l_min": l_min, "area_trib": area_trib, **slab[1], **beam[1], **foundation[1]}
+    return DesignResult(slab[0], beam[0], columns[0], wall, foundation[0], info, takedown)
+
+
+def design_graph(graph=None):
+    """Đăng ký các nút engine vào đồ thị; đầu vào là các trường của DesignInput."""
+    g = graph if graph is not None else DepGraph()
+    g.add("spans", span_limits, ["lx_list", "ly_list"], cutoff=True)
+    g.add("num_floors", lambda floors: sum(n for _, n in floors), ["floors"], cutoff=True)
+    g.add("slab", lambda spans, q_load: design_slab(spans[1], q_load), ["spans", "q_load"])
+    g.add("beam", lambda spans: design_beam(spans[0]), ["spans"])
+    g.add("columns", lambda n, q_load, spans, *rest: design_columns(n, q_load, spans[2], *rest), ["num_floors", "q_load", "spans", "rb", "col_shape", "b_col_fixed", "k_safety"])
+    g.add("takedown", column_takedown, ["lx_list", "ly_list", "num_floors", "q_load", "rb", "col_shape", "b_col_fixed", "k_safety"])
+    g.add("wall", lambda floors, has_wall: design_wall(v for v, _ in floors) if has_wall else pd.DataFrame(), ["floors", "has_shearwall"])
+    g.add("foundation", _foundation, ["columns", "found_type", "pile_type", "d_pile", "p_pile", "r_dat"])
+    g.add("design", _assemble, ["spans", "slab", "beam", "columns", "wall", "foundation", "takedown"])
+    return g
+
+
+def design_inputs(inp):
+    return {f.name: getattr(inp, f.name) for f in fields(inp)}
+
+
+# --- API CHÍNH ---
+@lru_cache(maxsize=64)
+def run_design(inp):
+    """Tính toàn bộ sơ bộ cho một bộ dữ liệu vào (memo theo DesignInput).
+
+    Kết quả được dùng chung giữa các lần gọi: không sửa trực tiếp các DataFrame trả về.
+    App dùng design_graph() trực tiếp để chỉ tính lại phần bị ảnh hưởng.
+    """
+    return design_graph().set(**design_inputs(inp)).get("design")
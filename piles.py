@@ -0,0 +1,110 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from engine import PILE_STD, PILE_CAPACITY, FOUND_PILE, pile_diameter
+from elements import MM, LOAD, NODE_KIND, status, frame
+
+# ==========================================
+# TỐI ƯU BỐ TRÍ CỌC CHO TỪNG ĐÀI (VECTOR HOÁ)
+# ==========================================
+# Phương án = loại cọc x lưới m x k cọc (m <= k), khoảng cách 3d, mép đài 0.7d:
+#   B = (m-1)*3d + d + 2*0.7d ; L = (k-1)*3d + d + 2*0.7d ; H đài = max(0.5, 2d)
+# Chi phí quy đổi (m3 bê tông đài): n cọc * A * chiều dài cọc * hệ số giá loại cọc + B*L*H.
+# Đạt khi n * P >= 1.2 * N (cùng hệ số như bảng móng).
+MAX_ROWS = 6
+PILE_LENGTH = 20.0
+PILE_COST = {"Vuông": 1.0, "Ly tâm": 0.8, "Khoan nhồi": 1.6}  # hệ số giá / m3 so với bê tông đài (tham khảo)
+FOOT_FACTOR = 1.1
+
+
+def _cost_factor(pile):
+    return next((v for k, v in PILE_COST.items() if pile.startswith(k)), 1.0)
+
+
+def _spec(piles, selected):
+    # loại cọc -> (d mm, P tấn)
+    spec = {p: (pile_diameter(p), PILE_CAPACITY[p]) for p in piles}
+    if selected is not None: spec[selected[0]] = tuple(selected[1:])
+    return spec
+
+
+def capacity_table(piles=PILE_STD, selected=None):
+    # Kích thước & sức chịu tải từng loại cọc dùng khi chọn bố trí (để người dùng thấy giả định)
+    spec = _spec(piles, selected)
+    return pd.DataFrame({"Loại cọc": list(spec), "d (mm)": [int(d) for d, _ in spec.values()], "P (T)": [float(p) for _, p in spec.values()],
+                         "Nguồn": ["Nhập ở sidebar" if selected is not None and p == selected[0] else "Giá trị tham khảo" for p in spec]})
+
+
+def candidates(piles=PILE_STD, max_rows=MAX_ROWS, pile_length=PILE_LENGTH, selected=None):
+    """Mọi phương án (loại cọc x m x k) dạng mảng phẳng.
+
+    selected=(loại cọc, d mm, P tấn) của sidebar: loại đó dùng d / P người dùng nhập (kể cả cọc tuỳ chỉnh),
+    các loại khác theo PILE_CAPACITY tham khảo.
+    """
+    spec = _spec(piles, selected)
+    piles = list(spec)
+    m, k = np.triu_indices(max_rows); m, k = m + 1, k + 1                 # (R,)
+    d = np.array([spec[p][0] for p in piles], dtype=float)[:, None] / 1000  # (P, 1)
+    round_ = np.array(["Vuông" not in p for p in piles])[:, None]
+    area = np.where(round_, math.pi * d**2 / 4, d**2)
+    factor = np.array([_cost_factor(p) for p in piles])[:, None]
+    n = m * k
+    s, e = 3 * d, 0.7 * d
+    B, L = (m - 1) * s + d + 2 * e, (k - 1) * s + d + 2 * e             # (P, R)
+    H = np.broadcast_to(np.maximum(0.5, 2 * d), B.shape)
+    cost = n * area * pile_length * factor + B * L * H
+    capacity = n * np.array([spec[p][1] for p in piles], dtype=float)[:, None] * 9.81
+    pile = np.broadcast_to(np.arange(len(piles))[:, None], B.shape)
+    return {"piles": piles, "pile": pile.ravel(), "m": np.broadcast_to(m, B.shape).ravel(), "k": np.broadcast_to(k, B.shape).ravel(), "n": np.broadcast_to(n, B.shape).ravel(),
+            "B": B.ravel(), "L": L.ravel(), "H": H.ravel(), "cost": cost.ravel(), "capacity": capacity.ravel()}
+
+
+def cheapest_layouts(N, cand):
+    """Chỉ số phương án rẻ nhất đạt cho từng tải N (kN); không có phương án đạt -> phương án chịu tải lớn nhất.
+
+    Chi phí không phụ thuộc nút: sắp phương án theo chi phí, lấy max tích luỹ của sức chịu tải
+    rồi searchsorted - phương án đầu tiên làm max vượt yêu cầu chính là phương án rẻ nhất đạt.
+    """
+    demand = 1.2 * np.asarray(N, dtype=float)
+    order = np.argsort(cand["cost"], kind="stable")
+    best = np.maximum.accumulate(cand["capacity"][order])
+    pos = np.searchsorted(best, demand, side="left")
+    ok = pos < len(order)
+    idx = np.where(ok, order[np.minimum(pos, len(order) - 1)], np.argmax(cand["capacity"]))
+    return idx, ok
+
+
+def footing_layout(td, piles=PILE_STD, max_rows=MAX_ROWS, pile_length=PILE_LENGTH, selected=None):
+    """Bảng đài cọc cho mọi nút lưới, tải chân cột = N tầng 1 x 1.1."""
+    cand = candidates(piles, max_rows, pile_length, selected)
+    N = td.N[0].astype(float) * FOOT_FACTOR if len(td.N) else np.zeros(len(td.area))
+    idx, ok = cheapest_layouts(N, cand)
+    cap = cand["capacity"][idx]
+    return frame({
+        "Trục X": np.tile(np.arange(1, td.nx + 1, dtype=MM), td.ny),
+        "Trục Y": np.repeat(np.arange(1, td.ny + 1, dtype=MM), td.nx),
+        "Loại": pd.Categorical.from_codes(td.kind, dtype=NODE_KIND),
+        "N chân cột (kN)": N.astype(LOAD),
+        "Loại cọc": pd.Categorical.from_codes(cand["pile"][idx], categories=cand["piles"]),
+        "Cọc theo X": cand["m"][idx].astype(MM), "Cọc theo Y": cand["k"][idx].astype(MM),
+        "Số cọc": cand["n"][idx].astype(MM),
+        "Đài B (m)": cand["B"][idx].astype(LOAD), "Đài L (m)": cand["L"][idx].astype(LOAD), "H đài (m)": cand["H"][idx].astype(LOAD),
+        "Chi phí quy đổi (m3)": cand["cost"][idx].astype(LOAD),
+        "Hệ số AT": np.divide(cap, 1.2 * N, out=np.zeros(len(N)), where=N > 0).astype(LOAD),
+        "Trạng thái": status(ok),
+    })
+
+
+def design_layout(design, inp):
+    # Bố trí cọc từng đài theo loại cọc / P của dữ liệu vào; móng nông -> None
+    if inp.found_type != FOUND_PILE or design.takedown is None: return None
+    return footing_layout(design.takedown, selected=(inp.pile_type, inp.d_pile, inp.p_pile))
+
+
+def layout_summary(df):
+    # Tổng hợp theo loại cọc: số đài, số cọc, chi phí
+    return (df.groupby("Loại cọc", observed=True)
+              .agg(**{"Số đài": ("Số cọc", "size"), "Tổng số cọc": ("Số cọc", "sum"), "Chi phí quy đổi (m3)": ("Chi phí quy đổi (m3)", "sum")})
+              .reset_index())
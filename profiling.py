@@ -0,0 +1,91 @@
+import json
+import time
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime
+
+import pandas as pd
+
+# ==========================================
+# ĐO HIỆU NĂNG TỪNG BƯỚC (BẬT/TẮT ĐƯỢC)
+# ==========================================
+HISTORY_LEN = 50
+_NULL = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("prof", "name", "t0")
+
+    def __init__(self, prof, name):
+        self.prof, self.name = prof, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.prof.add(self.name, time.perf_counter() - self.t0)
+
+
+def _entry(kind, stages, counts, total):
+    return {"time": datetime.now().isoformat(timespec="seconds"), "kind": kind, "total_s": total, "stages": dict(stages), "counts": dict(counts)}
+
+
+class Profiler:
+    """Gom thời gian từng bước của một lần chạy script; khi tắt mọi lời gọi chỉ trả về context rỗng."""
+
+    def __init__(self, enabled=False, history=None, kind="full"):
+        self.enabled, self.history, self.kind = enabled, history, kind
+        self.stages, self.counts = {}, {}
+        self.t0 = time.perf_counter(); self.done = False
+
+    def stage(self, name):
+        return _Stage(self, name) if self.enabled else _NULL
+
+    def add(self, name, dt):
+        self.stages[name] = self.stages.get(name, 0.0) + dt
+
+    def count(self, name, value):
+        if self.enabled: self.counts[name] = self.counts.get(name, 0) + value
+
+    def figure(self, name, fig):
+        if self.enabled:
+            self.count(f"{name}: traces", len(fig.data))
+            self.count(f"{name}: shapes", len(fig.layout.shapes))
+
+    def wrap(self, name, fn):
+        # Hàm xuất file chạy lúc bấm tải, ngoài lần chạy script: ghi thành một mục riêng trong lịch sử
+        if not self.enabled: return fn
+        history = self.history
+
+        def timed(*args, **kw):
+            t0 = time.perf_counter(); out = fn(*args, **kw); dt = time.perf_counter() - t0
+            if history is not None: history.append(_entry(name, {name: dt}, {f"{name}: bytes": len(out)}, dt))
+            return out
+        return timed
+
+    def rerun(self, kind):
+        # Fragment chạy lại một mình thì lần chạy đầy đủ đã kết thúc: mở bộ đo mới, dùng chung lịch sử
+        return Profiler(self.enabled, self.history, kind) if self.done else self
+
+    def finish(self):
+        if self.done: return None
+        self.done = True
+        if not self.enabled: return None
+        entry = _entry(self.kind, self.stages, self.counts, time.perf_counter() - self.t0)
+        if self.history is not None: self.history.append(entry)
+        return entry
+
+
+def new_history():
+    return deque(maxlen=HISTORY_LEN)
+
+
+def history_table(history):
+    # Mỗi dòng một lần chạy, mỗi cột một bước (ms)
+    rows = [{"Thời điểm": e["time"], "Loại": e["kind"], "Tổng (ms)": e["total_s"] * 1000, **{k: v * 1000 for k, v in e["stages"].items()}} for e in history]
+    return pd.DataFrame(rows)
+
+
+def history_json(history, meta=None):
+    return json.dumps({"meta": meta or {}, "runs": list(history)}, indent=1, ensure_ascii=False).encode("utf-8")
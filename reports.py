@@ -0,0 +1,191 @@
+import io
+from datetime import date
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+# xlsxwriter / python-docx (kéo theo lxml) chỉ được import trong hàm xuất file: app chỉ gọi khi bấm tải,
+# nên lần chạy đầu của phiên không phải trả chi phí nạp các thư viện này.
+from cache import LRUCache, content_hash
+from elements import display_table
+
+# --- BẢNG WORD DỰNG THEO KHỐI (BULK XML) ---
+# t.cell(i, j) của python-docx duyệt lại XML của bảng ở mỗi lần gọi (chi phí siêu tuyến tính);
+# ở đây các dòng được sinh thành chuỗi XML theo từng cột rồi parse theo khối.
+# Chuyển một cây lxml quá lớn vào tài liệu cũng siêu tuyến tính nên chia khối ROW_CHUNK dòng.
+# Dùng API nội bộ của python-docx (đã thử 1.1-1.2, xem requirements.txt): CT_Body._insert_tbl() để chèn
+# <w:tbl> đúng chỗ (trước sectPr) và Table(tbl, doc._body) để bọc lại thành bảng công khai. Nâng phiên bản
+# thì chạy benchmarks/suite.py --quick --stages docx: stage docx mở lại file và đếm bảng / dòng.
+ROW_CHUNK = 500
+
+def format_column(s):
+    # Định dạng số một lần cho cả cột
+    if s.empty: return s.astype(str)
+    if pd.api.types.is_bool_dtype(s): text = s.astype(str)
+    elif pd.api.types.is_integer_dtype(s): text = s.map("{:d}".format)
+    elif pd.api.types.is_float_dtype(s): text = s.map("{:.2f}".format).where(s.notna(), "")
+    else: text = s.astype(str)
+    return text.str.replace("&", "&amp;", regex=False).str.replace("<", "&lt;", regex=False).str.replace(">", "&gt;", regex=False)
+
+
+def add_table_bulk(doc, df, style='Table Grid'):
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+    from docx.shared import Emu
+    from docx.table import Table
+    section = doc.sections[-1]
+    col_tw = Emu((section.page_width - section.left_margin - section.right_margin) // max(df.shape[1], 1)).twips
+    tc_open = f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{col_tw}"/></w:tcPr><w:p>'
+    header = "".join(f'{tc_open}<w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">{escape(str(c))}</w:t></w:r></w:p></w:tc>' for c in df.columns)
+    grid = f'<w:gridCol w:w="{col_tw}"/>' * df.shape[1]
+    tbl = parse_xml(f'<w:tbl {nsdecls("w")}><w:tblPr><w:tblW w:type="auto" w:w="0"/>'
+                    '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>'
+                    f'<w:tblGrid>{grid}</w:tblGrid><w:tr><w:trPr><w:tblHeader/></w:trPr>{header}</w:tr></w:tbl>')
+    doc.element.body._insert_tbl(tbl)
+    rows = pd.Series("<w:tr>", index=df.index)
+    for col in df.columns:
+        rows = rows + (tc_open + '<w:r><w:t xml:space="preserve">') + format_column(df[col]) + "</w:t></w:r></w:p></w:tc>"
+    rows = (rows + "</w:tr>").tolist()
+    for i in range(0, len(rows), ROW_CHUNK):
+        tbl.extend(list(parse_xml(f'<w:tbl {nsdecls("w")}>' + "".join(rows[i:i + ROW_CHUNK]) + '</w:tbl>')))
+    table = Table(tbl, doc._body)
+    table.style = style
+    return table
+
+
+# --- HÀM TẠO FILE WORD (REPORT ENGINE) ---
+MAIN_TABLES = ("San", "Dam", "Cot", "Vach", "Mong")
+APPENDIX_TITLES = {"Mong_Nut": "Bố trí cọc theo từng đài", "Cot_Nut": "Tải trọng & tiết diện cột theo nút"}
+
+
+def create_docx_report(project_name, project_type, mat_info, load_info, design_results):
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt
+    doc = Document()
+    style = doc.styles['Normal']
+    font = style.font
+    font.name = 'Times New Roman'
+    font.size = Pt(12)
+
+    # Header
+    head = doc.add_heading(f'THUYẾT MINH TÍNH TOÁN KẾT CẤU SƠ BỘ', 0)
+    head.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    p = doc.add_paragraph(f"DỰ ÁN: {project_name.upper()}")
+    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph(f"Loại công trình: {project_type} | Ngày lập: {pd.Timestamp.now().strftime('%d/%m/%Y')}")
+    doc.add_paragraph("-" * 70)
+
+    # 1. Tiêu chuẩn
+    doc.add_heading('I. CÁC TIÊU CHUẨN ÁP DỤNG', level=1)
+    stds = ["TCVN 2737:2023: Tải trọng và tác động", "TCVN 5574:2018: Kết cấu bê tông cốt thép", "TCVN 9386:2012: Thiết kế kháng chấn", "TCVN 10304:2014: Móng cọc"]
+    for s in stds: doc.add_paragraph(s, style='List Bullet')
+
+    # 2. Vật liệu
+    doc.add_heading('II. THÔNG SỐ VẬT LIỆU', level=1)
+    doc.add_paragraph(f"1. Bê tông: {mat_info['conc']} (Rb = {mat_info['rb']} MPa)")
+    doc.add_paragraph(f"2. Cốt thép: {mat_info['steel']} (Rs = {mat_info['rs']} MPa)")
+    doc.add_paragraph(f"3. Tải trọng sàn quy đổi: q = {load_info} kN/m2")
+
+    # 3. Kết quả
+    doc.add_heading('III. KẾT QUẢ TÍNH TOÁN', level=1)
+    
+    def add_df(df, title):
+        doc.add_heading(title, level=2)
+        if df.empty:
+            doc.add_paragraph("Không áp dụng")
+            return
+        add_table_bulk(doc, display_table(df))
+        doc.add_paragraph("")
+
+    add_df(design_results['San'], "1. Sàn (Slab)")
+    add_df(design_results['Dam'], "2. Dầm (Beam)")
+    add_df(design_results['Cot'], "3. Cột (Column)")
+    if 'Vach' in design_results: add_df(design_results['Vach'], "4. Vách (Wall)")
+    add_df(design_results['Mong'], "5. Móng (Foundation)")
+
+    doc.add_heading('IV. KẾT LUẬN', level=1)
+    doc.add_paragraph("Phương án đảm bảo khả năng chịu lực sơ bộ. Cần kiểm toán chi tiết trong giai đoạn TKKT.")
+
+    # Phụ lục: các bảng theo nút (lớn dần theo lưới) - cùng bộ bảng với file Excel
+    extra = [k for k in design_results if k not in MAIN_TABLES]
+    if extra: doc.add_heading('PHỤ LỤC', level=1)
+    for i, k in enumerate(extra, 1): add_df(design_results[k], f"PL{i}. {APPENDIX_TITLES.get(k, k)}")
+
+    bio = io.BytesIO()
+    doc.save(bio)
+    return bio.getvalue()
+
+# --- XUẤT EXCEL (GHI TRỰC TIẾP BẰNG XLSXWRITER) ---
+STREAM_ROWS = 50_000   # từ số dòng này bật constant_memory (ghi tuần tự ra file tạm, RAM gần như không đổi)
+EXCEL_CHUNK = 10_000   # số dòng chuyển sang kiểu Python mỗi lần
+WIDTH_SAMPLE = 1_000   # số dòng lấy mẫu để ước lượng độ rộng cột chữ
+NUM_FORMATS = {"f": "0.00", "i": "0", "u": "0"}
+
+def column_width(s):
+    # Ước lượng từ kiểu dữ liệu / mẫu, không chuyển cả cột sang chuỗi
+    kind = s.dtype.kind
+    if s.empty: width = 0
+    elif kind in "iu": width = len(str(int(s.max()))) + (1 if s.min() < 0 else 0)
+    elif kind == "f": width = len(f"{s.abs().max():.2f}") + (1 if s.min() < 0 else 0)
+    elif kind == "b": width = 5
+    elif isinstance(s.dtype, pd.CategoricalDtype): width = int(s.cat.categories.astype(str).str.len().max())
+    else:
+        step = max(len(s) // WIDTH_SAMPLE, 1)
+        width = int(s.iloc[::step].astype(str).str.len().max())
+    return max(width, len(str(s.name))) + 2
+
+
+def _round_sig(x, digits=7):
+    # float32 -> float64 làm tròn 7 chữ số có nghĩa (0.7, không phải 0.699999988), không qua chuỗi
+    x = x.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        e = digits - 1 - np.floor(np.log10(np.abs(x)))
+        p = 10.0 ** np.abs(e)  # luỹ thừa dương của 10 là số chính xác
+        out = np.where(e >= 0, np.round(x * p) / p, np.round(x / p) * p)
+    return np.where(np.isfinite(out), out, x)
+
+
+def _column_values(s):
+    # Giá trị Python thuần; NaN -> None (ô trống như pandas)
+    if s.dtype == "float32": s = pd.Series(_round_sig(s.to_numpy()), index=s.index)
+    if s.dtype.kind == "f" and s.isna().any(): return [None if v != v else v for v in s.tolist()]
+    if isinstance(s.dtype, pd.CategoricalDtype) or s.dtype.kind in "OSUM": return s.astype(object).where(s.notna(), None).tolist()
+    return s.tolist()
+
+
+def to_excel(dfs, target=None, constant_memory=None):
+    """Ghi các bảng ra xlsx; target=None trả về bytes, hoặc ghi thẳng ra đường dẫn / file."""
+    import xlsxwriter
+    if constant_memory is None: constant_memory = sum(len(df) for df in dfs.values()) >= STREAM_ROWS
+    output = io.BytesIO() if target is None else target
+    wb = xlsxwriter.Workbook(output, {"constant_memory": constant_memory})
+    header_fmt = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+    num_fmts = {k: wb.add_format({"num_format": v}) for k, v in NUM_FORMATS.items()}
+    for sheet_name, df in dfs.items():
+        ws = wb.add_worksheet(sheet_name)
+        # display_table theo từng khối: cột chuỗi ghép ("1-A", "220x600") không dựng cho cả bảng;
+        # độ rộng cột ghép lấy từ mẫu, cột gốc đo trên dữ liệu gốc
+        sample = display_table(df.iloc[::max(len(df) // WIDTH_SAMPLE, 1)])
+        for i, col in enumerate(sample.columns):
+            ws.set_column(i, i, column_width(df[col] if col in df else sample[col]), num_fmts.get(sample[col].dtype.kind))
+        ws.write_row(0, 0, [str(c) for c in sample.columns], header_fmt)
+        for start in range(0, len(df), EXCEL_CHUNK):
+            chunk = display_table(df.iloc[start:start + EXCEL_CHUNK])
+            for r, row in enumerate(zip(*(_column_values(chunk[c]) for c in chunk.columns)), start + 1):
+                ws.write_row(r, 0, row)
+    wb.close()
+    return output.getvalue() if target is None else None
+
+# --- CACHE BÁO CÁO (CHỈ TẠO KHI TẢI XUỐNG) ---
+REPORT_CACHE = LRUCache(maxsize=16, max_bytes=64 * 1024 * 1024)
+
+def excel_bytes(dfs):
+    key = ("xlsx", content_hash(dfs))
+    return REPORT_CACHE.get_or_create(key, lambda: to_excel(dfs))
+
+def docx_bytes(project_name, project_type, mat_info, load_info, design_results):
+    # Ngày lập nằm trong file nên cũng là một phần của khoá
+    key = ("docx", content_hash(project_name, project_type, mat_info, load_info, design_results, date.today().isoformat()))
+    return REPORT_CACHE.get_or_create(key, lambda: create_docx_report(project_name, project_type, mat_info, load_info, design_results))
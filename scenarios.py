@@ -0,0 +1,116 @@
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import pandas as pd
+
+from cache import LRUCache
+from elements import display_table
+from engine import design_graph, design_inputs
+from piles import design_layout
+
+# ==========================================
+# KHÔNG GIAN PHƯƠNG ÁN (SO SÁNH NHIỀU KỊCH BẢN)
+# ==========================================
+# Mỗi phương án chỉ giữ DesignInput (vài chục số) + nhãn; kết quả engine nằm trong LRU giới hạn
+# theo số phương án, khoá theo DesignInput: phương án trùng đầu vào dùng chung kết quả,
+# phương án bị đẩy ra khỏi cache được tính lại khi cần. Tính bằng đồ thị mới, không qua memo toàn cục
+# của run_design: bị đẩy khỏi LRU này là bộ nhớ được giải phóng thật.
+RESULT_CACHE = 6
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    inp: object   # DesignInput
+    meta: tuple   # ((nhãn, giá trị), ...) chỉ để hiển thị
+
+
+class ScenarioResult(NamedTuple):
+    design: object   # DesignResult
+    layout: object   # bảng bố trí cọc từng đài (móng cọc) hoặc None
+
+
+class Workspace:
+    def __init__(self, max_results=RESULT_CACHE):
+        self.scenarios = {}
+        self.results = LRUCache(maxsize=max_results)
+        self.computed = 0
+
+    def __len__(self):
+        return len(self.scenarios)
+
+    def default_name(self, label):
+        # Số PA kế tiếp chưa dùng: xoá PA1 rồi lưu tiếp không ra "PA2" trùng với PA2 đang có
+        n = len(self) + 1
+        while any(name.startswith(f"PA{n}:") for name in self.scenarios): n += 1
+        return f"PA{n}: {label}"
+
+    def save(self, name, inp, meta=None, result=None, layout=None):
+        # Không ghi đè phương án đã lưu: muốn thay thì xoá trước
+        if name in self.scenarios: raise ValueError(f"Đã có phương án '{name}' - đặt tên khác hoặc xoá phương án cũ trước.")
+        self.scenarios[name] = Scenario(name, inp, tuple((meta or {}).items()))
+        # Kết quả đang có trên màn hình: không tính lại
+        if result is not None: self.results.put(inp, ScenarioResult(result, layout if layout is not None else design_layout(result, inp)))
+
+    def remove(self, name):
+        self.scenarios.pop(name, None)
+
+    def result(self, name):
+        inp = self.scenarios[name].inp
+        return self.results.get_or_create(inp, lambda: self._compute(inp))
+
+    def _compute(self, inp):
+        self.computed += 1
+        design = design_graph().set(**design_inputs(inp)).get("design")
+        return ScenarioResult(design, design_layout(design, inp))
+
+    def inputs_table(self):
+        rows = []
+        for sc in self.scenarios.values():
+            inp = sc.inp
+            rows.append({"Phương án": sc.name, **dict(sc.meta), "Rb (MPa)": inp.rb, "q (kN/m2)": inp.q_load, "Số tầng": inp.num_floors,
+                         "Lưới": f"{len(inp.lx_list)}x{len(inp.ly_list)} nhịp", "Cột": f"{inp.col_shape}, b={inp.b_col_fixed:g}", "Vách": "Có" if inp.has_shearwall else "Không"})
+        return pd.DataFrame(rows)
+
+
+# --- BẢNG SO SÁNH: hàng = hạng mục, cột = phương án (cột đầu là phương án gốc) ---
+def compare_columns(results):
+    cols = {}
+    for name, res in results.items():
+        df = res.design.col
+        cols[name] = pd.Series(display_table(df)["Tiết diện"].to_numpy(), index=df["Tầng từ"].astype(int).to_numpy()) if not df.empty else pd.Series(dtype=object)
+    out = pd.DataFrame(cols).sort_index()
+    out.index = [f"Từ tầng {i}" for i in out.index]
+    return out.fillna("-")
+
+
+def compare_beams(results):
+    return pd.DataFrame({name: display_table(res.design.beam).set_index("Cấu kiện")["Tiết diện CHỌN (mm)"] for name, res in results.items()}).fillna("-")
+
+
+def compare_foundation(results):
+    rows = {}
+    for name, (design, layout) in results.items():
+        f = design.found.iloc[0]; pile = "Số cọc CHỌN" in design.found
+        row = {"Loại móng": f["Cấu kiện"].removeprefix("Móng (").removesuffix(")"), "Tải chân cột N (kN)": f"{design.info['N_footing']:.1f}", "Phương án": design.info["mong_desc"], "Chi tiết": design.info["mong_detail"],
+               "Số cọc / đài": f"{int(f['Số cọc CHỌN'])}" if pile else "-", "Diện tích đáy (m2)": "-" if pile else f"{f['Diện tích CHỌN (m2)']:.2f}"}
+        if layout is not None:
+            # Khối lượng toàn nhà theo bố trí cọc tối ưu từng đài (tính cùng kết quả, nằm trong cache)
+            row.update({"Tổng số cọc (toàn nhà)": f"{int(layout['Số cọc'].sum())}", "Chi phí quy đổi (m3)": f"{float(layout['Chi phí quy đổi (m3)'].sum()):.1f}"})
+        rows[name] = row
+    return pd.DataFrame(rows).fillna("-")
+
+
+def compare_summary(results):
+    rows = {}
+    for name, res in results.items():
+        info, col = res.design.info, res.design.col
+        rows[name] = {"Sàn (mm)": f"{int(info['hs_select'])}", "Dầm chính (mm)": f"{int(info['bd_select'])}x{int(info['hd_select'])}",
+                      "Cột tầng 1 (mm)": f"{col['b (mm)'].iat[0]}x{col['h (mm)'].iat[0]}" if not col.empty else "-",
+                      "Tải cột tầng 1 (kN)": f"{col['Tải N (kN)'].iat[0]:.1f}" if not col.empty else "-", "Móng": info["mong_desc"]}
+    return pd.DataFrame(rows)
+
+
+def diff_mask(df):
+    # Ô khác phương án gốc (cột đầu tiên)
+    return df.ne(df.iloc[:, 0], axis=0) if df.shape[1] else df.astype(bool)
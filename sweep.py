@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from engine import RB_MAP, PILE_CAPACITY, B_COL_RANGE, tributary_widths, select_sections, span_limits, design_slab, design_beam
+
+# ==========================================
+# QUÉT PHƯƠNG ÁN (PARAMETRIC SWEEP)
+# ==========================================
+SWEEP_COLS = ["Bê tông", "Thép", "b cột (mm)", "Loại cọc", "Số tầng"]
+METRIC_COLS = ["V bê tông (m3)", "A cột tầng 1 (m2)", "Số cọc"]
+PARALLEL_MIN_WORK = 5_000_000
+
+
+def heights_for(floors, n):
+    # Giữ cao độ gốc, thiếu thì lặp lại chiều cao tầng trên cùng; chỉ trải các đoạn tới tầng n
+    floors = list(floors) or [(3.3, 1)]
+    v = np.array([h for h, _ in floors], dtype=float)
+    c = np.diff(np.minimum(np.cumsum([k for _, k in floors]), n), prepend=0)
+    c[-1] += n - c.sum()
+    return np.repeat(v, c)
+
+
+def _evaluate_floor_count(task):
+    # Một số tầng = một khối vector hoá trên (mác BT x b cột x loại cọc)
+    areas, counts, heights, q_load, k_safety, rbs, b_cols, col_shape, caps, vol_per_floor = task
+    n = len(heights)
+    N = k_safety * q_load * np.outer(np.arange(n, 0, -1, dtype=float), areas)  # (n, U)
+    vol = np.empty((len(rbs), len(b_cols))); col_area = np.empty_like(vol)
+    for g, rb in enumerate(rbs):
+        A_req = N[None] * 1000 / rb  # (1, n, U)
+        b, h = select_sections(A_req, col_shape, b_cols[:, None, None])  # (B, n, U)
+        bh = b.astype(float) * h
+        vol[g] = np.einsum("bnu,n,u->b", bh, heights, counts) / 1e6 + vol_per_floor * n
+        col_area[g] = (bh[:, 0, :] * counts).sum(-1) / 1e6
+    N_base = N[0] * 1.1 if n else np.zeros_like(areas)
+    piles = (np.ceil(N_base[None] / (caps[:, None] * 9.81) * 1.2) * counts).sum(-1)  # (P,)
+    return vol, col_area, piles
+
+
+def run_sweep(inp, grades, steels, b_cols, piles, floor_counts, workers=None):
+    """Đánh giá tích Descartes các phương án; trả về DataFrame 1 dòng / phương án.
+
+    Thép chủ chưa tham gia công thức sơ bộ (cột chỉ xét Rb) nên chỉ được mang theo để so sánh.
+    """
+    bad = [b for b in b_cols if not B_COL_RANGE[0] <= b <= B_COL_RANGE[1]]
+    if bad: raise ValueError(f"Cạnh b cột ngoài khoảng {B_COL_RANGE[0]}-{B_COL_RANGE[1]} mm: {', '.join(f'{b:g}' for b in bad)}")
+    rbs = np.array([RB_MAP[g] for g in grades], dtype=float)
+    b_arr = np.array(b_cols, dtype=float)
+    caps = np.array([PILE_CAPACITY[p] for p in piles], dtype=float)
+    # Gom các nút có cùng diện tích truyền tải: kết quả giống hệt, ít phép tính hơn
+    areas, counts = np.unique(np.outer(tributary_widths(inp.ly_list), tributary_widths(inp.lx_list)), return_counts=True)
+    l_max, l_min, _ = span_limits(inp.lx_list, inp.ly_list)
+    _, slab = design_slab(l_min, inp.q_load); _, beam = design_beam(l_max)
+    Lx, Ly = sum(inp.lx_list), sum(inp.ly_list)
+    beam_len = (len(inp.ly_list) + 1) * Lx + (len(inp.lx_list) + 1) * Ly
+    vol_per_floor = Lx * Ly * slab["hs_select"] / 1000 + beam_len * beam["bd_select"] * beam["hd_select"] / 1e6
+    tasks = [(areas, counts.astype(float), heights_for(inp.floors, n), inp.q_load, inp.k_safety, rbs, b_arr, inp.col_shape, caps, vol_per_floor) for n in floor_counts]
+
+    # Process pool chỉ đáng khi khối lượng đủ lớn để bù chi phí khởi tạo tiến trình
+    work = len(areas) * len(rbs) * len(b_arr) * sum(floor_counts)
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1 and work >= PARALLEL_MIN_WORK:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as ex:
+            results = list(ex.map(_evaluate_floor_count, tasks))
+    else:
+        results = [_evaluate_floor_count(t) for t in tasks]
+
+    G, S, B, P, F = len(grades), len(steels), len(b_cols), len(piles), len(floor_counts)
+    shape = (F, G, S, B, P)
+    vol = np.stack([r[0] for r in results])[:, :, None, :, None]
+    col_area = np.stack([r[1] for r in results])[:, :, None, :, None]
+    n_piles = np.stack([r[2] for r in results])[:, None, None, None, :]
+    idx = np.indices(shape).reshape(len(shape), -1)
+    return pd.DataFrame({
+        "Bê tông": pd.Categorical.from_codes(idx[1], list(grades)),
+        "Thép": pd.Categorical.from_codes(idx[2], list(steels)),
+        "b cột (mm)": np.asarray(b_cols)[idx[3]],
+        "Loại cọc": pd.Categorical.from_codes(idx[4], list(piles)),
+        "Số tầng": np.asarray(floor_counts)[idx[0]],
+        "V bê tông (m3)": np.broadcast_to(vol, shape).ravel(),
+        "A cột tầng 1 (m2)": np.broadcast_to(col_area, shape).ravel(),
+        "Số cọc": np.broadcast_to(n_piles, shape).ravel().astype(np.int64),
+    })
+
+
+def pareto_mask(costs):
+    """Mặt Pareto (cực tiểu mọi cột); các điểm trùng giá trị đều được giữ."""
+    costs = np.asarray(costs, dtype=float)
+    uniq, inverse = np.unique(costs, axis=0, return_inverse=True)
+    keep = np.arange(len(uniq)); pts = uniq; i = 0
+    while i < len(pts):
+        mask = np.any(pts < pts[i], axis=1); mask[i] = True
+        keep, pts = keep[mask], pts[mask]
+        i = np.sum(mask[:i]) + 1
+    front = np.zeros(len(uniq), dtype=bool); front[keep] = True
+    return front[inverse.ravel()]
+
+
+def pareto_front(df, cols=METRIC_COLS, by=None):
+    if by is None: return df[pareto_mask(df[cols].to_numpy())]
+    mask = np.zeros(len(df), dtype=bool)
+    for _, pos in df.groupby(by, observed=True).indices.items(): mask[pos] = pareto_mask(df[cols].to_numpy()[pos])
+    return df[mask]